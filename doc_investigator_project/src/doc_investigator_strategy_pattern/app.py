@@ -32,7 +32,7 @@ import gradio as gr
 import os
 import sqlite3
 from datetime import datetime
-from typing import Any, List, Optional, Tuple
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from loguru import logger
 from ydata_profiling import ProfileReport
 from pydantic import ValidationError
@@ -43,7 +43,7 @@ from .database import InteractionLog # Pydantic model
 from . import analysis
 
 # factory for burr instances
-from .state_machine import build_application
+from .state_machine import bind_actions, build_application
 
 # if typing, avoid circular imports at runtime
 from typing import TYPE_CHECKING
@@ -58,6 +58,10 @@ if TYPE_CHECKING:
 # Coding
 # ----------
 
+# shared no-op update for outputs a handler leaves unchanged;
+# Gradio pops only the 'value' key of an update dict, so this empty one is never mutated
+_NOOP_UPDATE = gr.update()
+
 class AppUI:
     """
     Encapsulates the Gradio UI and its event handling logic.
@@ -85,7 +89,8 @@ class AppUI:
         self.db_manager = db_manager
         self.doc_processor = doc_processor
         self.ai_service = ai_service
-        self.burr_app: Optional[Application] = None
+        # services are fixed for the lifetime of the UI, their actions are bound once
+        self._burr_actions = bind_actions(config, db_manager, doc_processor, ai_service)
         # `_build_ui` method returns Gradio app object, stored here
         self.app: gr.Blocks = self._build_ui()
 
@@ -121,6 +126,9 @@ class AppUI:
             state_temperature = gr.State(None)
             state_top_p = gr.State(None)
             state_profile_report = gr.State(None)
+            # Burr app of the session's investigation, awaiting its human evaluation;
+            # concurrent sessions run their own apps, so it can't live on the shared AppUI
+            state_burr_app = gr.State(None)
 
             # --- UI Layout ---
             # panel header
@@ -140,6 +148,7 @@ class AppUI:
                         state_last_answer,
                         state_temperature,
                         state_top_p,
+                        state_burr_app,
                     )
                 with gr.TabItem("Evaluation Analysis"):
                     self._build_analyze_tab(state_profile_report)
@@ -152,6 +161,7 @@ class AppUI:
         state_last_answer: gr.State,
         state_temperature: gr.State,
         state_top_p: gr.State,
+        state_burr_app: gr.State,
         #state_profile_report = gr.State(None),
     ) -> None:
         """Builds the main 'Investigate' tab UI components."""
@@ -255,7 +265,9 @@ class AppUI:
                        state_last_prompt,
                        state_last_answer,
                        state_temperature,
-                       state_top_p]
+                       state_top_p,
+                       state_burr_app],
+            concurrency_limit = self.config.MAX_CONCURRENT_LLM
         )
 
         evaluation_button.click(
@@ -266,7 +278,8 @@ class AppUI:
                       evaluation_radio,
                       eval_reason_textbox,
                       state_temperature,
-                      state_top_p],
+                      state_top_p,
+                      state_burr_app],
             outputs = [file_uploader,
                        prompt_input,
                        answer_output,
@@ -277,7 +290,8 @@ class AppUI:
                        state_last_prompt,
                        state_last_answer,
                        temperature_slider,
-                       top_p_slider]
+                       top_p_slider,
+                       state_burr_app]
         )
         
         reset_llm_button.click(
@@ -432,15 +446,19 @@ class AppUI:
             return None  # Failure: Returning None resets file uploader
 
 
-    def _handle_investigation(self,
-                              files: Optional[List[Any]],
-                              prompt: str,
-                              temperature: float,
-                              top_p: float
-    ) -> Tuple[Any, ...]:
+    async def _handle_investigation(self,
+                                    files: Optional[List[Any]],
+                                    prompt: str,
+                                    temperature: float,
+                                    top_p: float
+    ) -> AsyncIterator[Tuple[Any, ...]]:
         """
         Orchestrates main investigation workflow with dynamic LLM parameters by using Burr state machine.
-        Creates a fresh Burr app instance for each run to ensure isolation.
+        Creates a fresh Burr app instance for each run to ensure isolation, it's kept in a local
+        variable, as sessions run this handler concurrently, and handed to the session's state
+        if it awaits the human evaluation.
+        Runs async and streams a newly generated answer into the answer box while it is created,
+        the final UI update follows after the flow halted.
 
         Raises:
             gr.Error: If user inputs are invalid (no files, no prompt).
@@ -451,11 +469,12 @@ class AppUI:
             raise gr.Error("Please enter a prompt to continue.")
             
         logger.info("UI: Start investigation via new fresh Burr state machine instance.")
-        self.burr_app = build_application(
+        burr_app = build_application(
             config = self.config,
             db_manager = self.db_manager,
             doc_processor = self.doc_processor,
             ai_service = self.ai_service,
+            actions = self._burr_actions,
         )
         
         inputs = {
@@ -464,15 +483,26 @@ class AppUI:
             "llm_params": {"temperature": temperature, "top_p": top_p}
         }
         
-        # state machine run until it halts or finishes
-        _, _, _ = self.burr_app.run(
+        # state machine runs until answer generation starts, or halts or finishes on a cache hit resp. error
+        action, streaming_result = await burr_app.astream_result(
             halt_before = ["error"],
-            halt_after = ["await_human_evaluation", "end"],
+            halt_after = ["generate_answer", "await_human_evaluation", "end"],
             inputs = inputs
         )
+        if action.name == "generate_answer":
+            async for result in streaming_result:
+                # partial answer only, other outputs unchanged until the flow halts
+                yield (gr.update(value = result["llm_answer"]), gr.update(visible = False),
+                       _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE)
+            await streaming_result.get()
+            # remaining steps after the answer: classification, caching, logging
+            _, _, _ = await burr_app.arun(
+                halt_before = ["error"],
+                halt_after = ["await_human_evaluation", "end"]
+            )
         
         #  true, complete state from the application object itself
-        state_data = self.burr_app.state
+        state_data = burr_app.state
         
         # validation or pre-processing error handling
         # check for key that might be None
@@ -482,21 +512,22 @@ class AppUI:
         # UI update based on final state
         if state_data.get("is_real_answer"):
             logger.success("Burr flow halted for human evaluation. Updating UI.")
-            return (
+            yield (
                 gr.update(value = state_data["llm_answer"]),
                 gr.update(visible = True),
                 state_data["doc_names"],
                 state_data["prompt"],
                 state_data["llm_answer"],
                 temperature,
-                top_p
+                top_p,
+                burr_app
             )
         else: # auto_log_and_terminate as final step
             logger.info("Burr flow finished (auto-logged or cache hit). Updating UI.")
-            return (
+            yield (
                 gr.update(value = state_data["llm_answer"]),
                 gr.update(visible = False),
-                None, None, None, None, None
+                None, None, None, None, None, None
             )    
 
 
@@ -507,21 +538,22 @@ class AppUI:
                            choice: Optional[str],
                            eval_reason: str,
                            temperature: float,
-                           top_p: float
+                           top_p: float,
+                           burr_app: Optional[Application]
     ) -> Tuple[Any, ...]:
         """
         Handles user's evaluation submission by using Burr state machine.
-        Resumes the active Burr app and resets UI while preserving slider state.
+        Resumes the session's halted Burr app and resets UI while preserving slider state.
         """
         if not choice:
             gr.Warning("Please select an evaluation passed option ('Yes' or 'No') before submitting.")
             # return no-op updates to keep UI state as-is
-            return (gr.update(), gr.update(), gr.update(),
+            return (_NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE,
                     gr.update(visible = True),
-                    gr.update(), gr.update(), gr.update(),
-                    gr.update(), gr.update(),gr.update(),gr.update(),)
+                    _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE,
+                    _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE, _NOOP_UPDATE)
 
-        if not self.burr_app:
+        if not burr_app:
             raise gr.Error("No active investigation to evaluate.")
 
         logger.info("UI: Resuming Burr flow with human evaluation.")
@@ -538,9 +570,9 @@ class AppUI:
         }
         
         # machine step forward to action 'process_human_evaluation'
-        self.burr_app.step(inputs = inputs)
+        burr_app.step(inputs = inputs)
         # add additional step to ensure 'end' state is reached
-        self.burr_app.step()
+        burr_app.step()
 
         gr.Info("Evaluation saved! The interface has been reset.")
         
@@ -549,5 +581,6 @@ class AppUI:
             None, "", "<p style='color:grey;'>The answer will be shown here...</p>",
             gr.update(visible = False),
             None, "", None, None, None,
-            gr.update(), gr.update()   # reset sliders to the last set values
+            _NOOP_UPDATE, _NOOP_UPDATE,  # reset sliders to the last set values
+            None                         # investigation of the session is finished
         )
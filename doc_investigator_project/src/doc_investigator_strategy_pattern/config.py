@@ -9,7 +9,7 @@ Defines a frozen dataclass to hold all application-wide configuration settings.
 # Imports
 # ----------
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 # ----------
 # Coding
@@ -27,6 +27,11 @@ class Config:
 
     # --- Database Settings ---
     DB_FILE: str = "doc_investigator_prod.db"
+    # prompt and answer are always stored zstd compressed, additionally as plain
+    # TEXT columns as long as Datasette and the CSV profiling workflow read them:
+    # SQL can't decompress zstd, so they would only see BLOBs; the dual write makes rows larger,
+    # set False to store compressed text only, if the app is the only reader ('fetch_interaction')
+    DB_STORE_PLAIN_TEXT: bool = True
 
     # --- LLM and AI Service Settings ---
      # Use a model name confirmed available via `genai.list_models()`
@@ -35,6 +40,41 @@ class Config:
     TEMPERATURE: float = 0.2    # low value - more deterministic, focused; default value
     TOP_P: float = 0.95         # nucleus sampling parameter; default value
     MAX_CONTEXT_CHARACTERS: int = 800000 # Corresponds to ~1M tokens for Gemini
+    MAX_PROMPT_CHARACTERS: int = 4096    # longer prompts are rejected before document extraction
+    # Gemini API transport, None keeps the SDK default (gRPC);
+    # 'rest' sends plain HTTPS requests, e.g. to record them for replay in tests
+    GEMINI_TRANSPORT: Optional[str] = None
+
+    # --- Answer Cache Settings ---
+    MEM_CACHE_SIZE: int = 1024                # answers kept in-process in front of the SQLite cache
+    CACHE_TTL_SECONDS: Optional[int] = None   # cached answers may become outdated, None keeps them
+
+    # --- Semantic Cache Settings ---
+    # after an exact cache miss, reuse the answer of a similar prompt for the same
+    # documents and LLM params; off by default, each lookup costs an embedding call
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # minimal cosine similarity of prompt embeddings
+    EMBEDDING_MODEL_NAME: str = "models/text-embedding-004"
+
+    # --- Gemini Context Cache Settings ---
+    # documents are uploaded once as cached content, follow-up questions only send the question;
+    # Gemini requires a minimal token count, smaller contexts are sent inline
+    CONTEXT_CACHE_ENABLED: bool = True
+    CONTEXT_CACHE_MIN_CHARACTERS: int = 16000  # ~4096 tokens
+    CONTEXT_CACHE_TTL_MINUTES: int = 30
+    CONTEXT_CACHE_MAX_ENTRIES: int = 16
+
+    # --- Tracing Settings ---
+    # Burr tracking of all actions and OpenTelemetry spans of Gemini calls, shown in Burr UI;
+    # disabled, no per-step tracking or span overhead is paid
+    TRACE_ENABLED: bool = True
+    TRACE_STORAGE_DIR: str = "./.burr"  # Burr tracking data, read by the Burr UI
+
+    # --- Concurrency Settings ---
+    MAX_CONCURRENT_LLM: int = 8  # max. in-flight async Gemini calls, shared by all sessions
+    # Uvicorn worker processes; a Gradio session and its Burr app live in one process,
+    # so more than one worker requires sticky sessions of a load balancer in front
+    SERVER_WORKERS: int = 1
 
     # --- Application Logic Settings ---
     UNKNOWN_ANSWER: str = "Your request is unknown, associated information is not available. Please try again!"
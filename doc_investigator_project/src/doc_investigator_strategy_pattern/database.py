@@ -8,20 +8,35 @@ with the SQLite database. It handles connection, setup, schema migration
 and data logging operations, ensuring all DB logic is centralized and
 decoupled from rest of applications business use case logic.
 
-Additionally, a hash-based caching feature is implemented, not a semantic cache feature by now.
+Additionally, a hash-based caching feature is implemented, optionally extended by a semantic cache tier.
 The cache key uniquely identifies a request, which is a combination of the business components:
 document content, the user's prompt and the complete set of LLM parameters.
 A new cache table is created in our SQLite database.
 The Burr state machine orchestrates this logic: the cache-check step happens right before the expensive LLM call.
 If an answer is available for the same document and user question resp. task, it will be shown in the app UI.
+The semantic cache tier stores prompt embeddings per document fingerprint and LLM parameters; after an
+exact-match miss, a stored answer of a prompt with cosine similarity above a threshold is reused.
+
+Prompt and answer texts of the interactions table are additionally stored as zstd compressed
+BLOB columns ('prompt_zstd', 'answer_zstd'). The plain TEXT columns are only written as long as
+readers like Datasette need them, see Config.DB_STORE_PLAIN_TEXT.
 """
 
 # ----------
 # Imports
 # ----------
 import sqlite3
-from datetime import datetime
-from typing import List, Optional
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import zstandard as zstd
 from loguru import logger
 from pydantic import BaseModel, Field
 
@@ -29,6 +44,54 @@ from pydantic import BaseModel, Field
 # Coding
 # ----------
 
+# larger pages for text-heavy rows reduce b-tree depth,
+# only applied to a fresh database before its first table exists
+PAGE_SIZE = 16384
+
+# per connection read tuning: memory-mapped I/O (smaller on 32-bit address spaces)
+# and a page cache of 64 MiB (negative value means KiB for SQLite)
+MMAP_SIZE = 256 * 1024 * 1024 if sys.maxsize > 2**32 else 64 * 1024 * 1024
+CACHE_SIZE_KIB = 64 * 1024
+
+# prepared statements kept per connection (sqlite3's default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+_INSERT_INTERACTION_SQL = """
+    INSERT INTO interactions (timestamp, document_names, prompt, answer, output_passed, eval_reason, model_name, temperature, top_p, prompt_zstd, answer_zstd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# constant SQL texts, so sqlite3's per connection statement cache reuses their prepared statements
+_GET_CACHED_ANSWER_SQL = "SELECT llm_answer, created_at FROM interactions_cache WHERE cache_key = ?"
+_SET_CACHED_ANSWER_SQL = "INSERT OR REPLACE INTO interactions_cache (cache_key, llm_answer, created_at) VALUES (?, ?, ?)"
+
+# level 3 is zstd's default trade-off between speed and ratio for natural-language text
+ZSTD_LEVEL = 3
+
+# semantic cache candidates reranked on exact float32 embeddings after the int8 scan
+SEMANTIC_RERANK_TOP_K = 5
+
+def _compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Compresses a text as zstd frame; one-shot API, safe to call from concurrent Gradio workers."""
+    if text is None:
+        return None
+    return zstd.compress(text.encode('utf-8'), ZSTD_LEVEL)
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """Scales a vector to unit length, so dot products are cosine similarities."""
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _quantize(vector: np.ndarray) -> np.ndarray:
+    """Scalar quantizes a unit vector to int8, its components lie within [-1, 1]."""
+    return np.clip(np.rint(vector * 127), -127, 127).astype(np.int8)
+
+def _decompress_text(blob: Optional[bytes]) -> Optional[str]:
+    """Decompresses a zstd frame created by '_compress_text' back to text."""
+    if blob is None:
+        return None
+    return zstd.decompress(blob).decode('utf-8')
+
 class InteractionLog(BaseModel):
     """
     A Pydantic model representing a single user interaction record.
@@ -51,24 +114,97 @@ class DatabaseManager:
     creation and evolution to ensure all necessary columns are present.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self,
+                 db_path: str,
+                 store_plain_text: bool = True,
+                 mem_cache_size: int = 1024,
+                 cache_ttl_seconds: Optional[int] = None) -> None:
         """
         Initializes the DatabaseManager and sets up the database.
 
         Args:
-            db_path (str): file path for the SQLite database
+            db_path (str): file path for the SQLite database, ':memory:' keeps it in RAM
+                           for the lifetime of the manager (e.g. for tests)
+            store_plain_text (bool): if False, prompt and answer are only stored
+                                     in their zstd compressed columns
+            mem_cache_size (int): max. number of answers kept in the in-process LRU
+                                  in front of the SQLite cache, 0 disables it
+            cache_ttl_seconds (Optional[int]): age after which cached answers are ignored,
+                                               None keeps them forever
 
         Raises:
             sqlite3.Error: If database connection or setup fails critically
         """
         self.db_path = db_path
-        logger.info(f"Initializing DatabaseManager with database at '{db_path}'.")
+        self.store_plain_text = store_plain_text
+        self.mem_cache_size = mem_cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        # in-process LRU tier: cache key -> (answer, monotonic expiry time or None),
+        # guarded by a lock as Gradio may handle sessions concurrently
+        self._mem_cache: "OrderedDict[bytes, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._mem_lock = threading.RLock()
+        # per thread connection of the 'connection' property
+        self._local = threading.local()
+        # an in-memory database lives as long as one connection to it is open,
+        # all connections of this manager share it via a named shared-cache URI
+        self._memory_keeper: Optional[sqlite3.Connection] = None
+        self._connect_target = db_path
+        if db_path == ":memory:":
+            self._connect_target = f"file:doc_investigator_{uuid.uuid4().hex}?mode=memory&cache=shared"
+            self._memory_keeper = sqlite3.connect(self._connect_target, uri = True, check_same_thread = False)
+        logger.info("Initializing DatabaseManager with database at '{}'.", db_path)
         try:
             self._setup_database()
         except sqlite3.Error as e:
-            logger.critical(f"FATAL: Database setup failed. Application cannot proceed. Error: {e}", exc_info = True)
+            logger.critical("FATAL: Database setup failed. Application cannot proceed. Error: {}", e, exc_info = True)
             raise
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens a connection to the database with the tuning PRAGMAs applied,
+        all are connection settings and not stored in the database file.
+        In WAL mode, synchronous NORMAL syncs on checkpoints only, not on each commit.
+
+        Returns:
+            sqlite3.Connection: the configured connection
+        """
+        conn = sqlite3.connect(self._connect_target,
+                               uri = self._memory_keeper is not None,
+                               cached_statements = STATEMENT_CACHE_SIZE)
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Connection of the calling thread, opened on first access and reused afterwards
+        by all reads and writes, so its PRAGMAs are applied once and its statement cache
+        keeps the prepared statements of hot-path lookups across calls.
+        sqlite3 connections must not be shared between threads, so each thread gets its own.
+
+        Returns:
+            sqlite3.Connection: the configured connection of the calling thread
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def atomic(self) -> Iterator[sqlite3.Connection]:
+        """
+        Provides a connection whose writes are committed together in one transaction,
+        or rolled back together if an error occurs.
+
+        Yields:
+            sqlite3.Connection: the connection of the calling thread to write with
+        """
+        with self.connection as conn:
+            yield conn
+
     def _setup_database(self) -> None:
         """
         Initializes the database and creates resp. alters the interactions table.
@@ -80,9 +216,17 @@ class DatabaseManager:
         Second table is the interactions cache table.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
 
+                # page size only takes effect before the schema exists
+                if cursor.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0:
+                    logger.debug("Fresh database, setting page size to {} bytes.", PAGE_SIZE)
+                    cursor.execute(f"PRAGMA page_size = {PAGE_SIZE}")
+
+                # write-ahead log is persistent in the database file, readers don't block the writer
+                cursor.execute("PRAGMA journal_mode = WAL")
+
                 # interactions table setup
                 logger.debug("Ensuring 'interactions' table exists...")
                 cursor.execute("""
@@ -113,32 +257,86 @@ class DatabaseManager:
                     "temperature": "REAL",
                     "top_p": "REAL",
                     "model_name": "TEXT",
-                    "eval_reason": "TEXT"
+                    "eval_reason": "TEXT",
+                    "prompt_zstd": "BLOB",
+                    "answer_zstd": "BLOB"
                 }
                 
                 for col_name, col_type in new_columns.items():
                     if col_name not in column_names:
-                        logger.info(f"Schema migration: Adding '{col_name}' column to 'interactions' table.")
+                        logger.info("Schema migration: Adding '{}' column to 'interactions' table.", col_name)
                         cursor.execute(f"ALTER TABLE interactions ADD COLUMN {col_name} {col_type}")
 
-                # interactions_cache table setup
+                # interactions_cache table setup, keys are raw 32 byte digests
                 logger.debug("Ensuring 'interactions_cache' table exists...")
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS interactions_cache (
-                        cache_key TEXT PRIMARY KEY,
+                        cache_key BLOB PRIMARY KEY,
                         llm_answer TEXT NOT NULL,
                         created_at TEXT NOT NULL
                     )
-                """)    
+                """)
+                cache_columns = {info[1]: info[2] for info in cursor.execute("PRAGMA table_info(interactions_cache)").fetchall()}
+                if cache_columns.get("cache_key") == "TEXT":
+                    self._migrate_hex_cache_keys(cursor)
+
+                # semantic_cache table setup, candidates are looked up per document and LLM params
+                logger.debug("Ensuring 'semantic_cache' table exists...")
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS semantic_cache (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        doc_fingerprint TEXT NOT NULL,
+                        params_key TEXT NOT NULL,
+                        embedding BLOB NOT NULL,
+                        embedding_q8 BLOB,
+                        llm_answer TEXT NOT NULL,
+                        created_at TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_semantic_cache_scope
+                    ON semantic_cache (doc_fingerprint, params_key)
+                """)
+                semantic_columns = [info[1] for info in cursor.execute("PRAGMA table_info(semantic_cache)").fetchall()]
+                if "embedding_q8" not in semantic_columns:
+                    logger.info("Schema migration: Adding 'embedding_q8' column to 'semantic_cache' table.")
+                    cursor.execute("ALTER TABLE semantic_cache ADD COLUMN embedding_q8 BLOB")
+                    rows = cursor.execute("SELECT id, embedding FROM semantic_cache").fetchall()
+                    cursor.executemany(
+                        "UPDATE semantic_cache SET embedding_q8 = ? WHERE id = ?",
+                        [(_quantize(np.frombuffer(blob, dtype = np.float32)).tobytes(), row_id) for row_id, blob in rows]
+                    )
 
                 conn.commit()
-                logger.success(f"Database '{self.db_path}' is ready with all required schemas and tables.")
+                logger.success("Database '{}' is ready with all required schemas and tables.", self.db_path)
 
         except sqlite3.Error as e:
             # critical failure, log and re-raise to be caught by __init__
-            logger.error(f"Could not initialize or migrate the database schemas. Error: {e}", exc_info=True)
+            logger.error("Could not initialize or migrate the database schemas. Error: {}", e, exc_info=True)
             raise
 
+    def _migrate_hex_cache_keys(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Rebuilds the interactions_cache table with a BLOB primary key,
+        stored hex string keys are converted to their raw digest bytes.
+        """
+        logger.info("Schema migration: Converting 'interactions_cache' hex keys to BLOB digests.")
+        rows = cursor.execute("SELECT cache_key, llm_answer, created_at FROM interactions_cache").fetchall()
+        cursor.execute("ALTER TABLE interactions_cache RENAME TO interactions_cache_hex")
+        cursor.execute("""
+            CREATE TABLE interactions_cache (
+                cache_key BLOB PRIMARY KEY,
+                llm_answer TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cursor.executemany(
+            _SET_CACHED_ANSWER_SQL,
+            [(bytes.fromhex(key) if isinstance(key, str) else key, answer, created_at)
+             for key, answer, created_at in rows]
+        )
+        cursor.execute("DROP TABLE interactions_cache_hex")
+
     def log_interaction(self, interaction_log: InteractionLog) -> None:
         """
         Logs a validated user interaction record to SQLite database.
@@ -151,73 +349,298 @@ class DatabaseManager:
             sqlite3.Error: If there is an issue with DB transaction, allows
                            caller (UI layer) to handle error gracefully
         """
+        self.log_interactions([interaction_log])
+        logger.info("Successfully logged interaction for evaluation: '{}'.", interaction_log.output_passed)
+
+    def log_interactions(self, interaction_logs: List[InteractionLog]) -> None:
+        """
+        Logs several validated user interaction records with one 'executemany'
+        call inside a single transaction, so one commit covers all rows.
+        Uses the reused connection of the calling thread, its statement cache keeps
+        the prepared INSERT statement across calls.
+
+        Args:
+            interaction_logs (List[InteractionLog]): Pydantic models of the log entries
+
+        Raises:
+            sqlite3.Error: If there is an issue with DB transaction, no row is
+                           stored then, the caller handles the error
+        """
+        rows = [self._to_row(interaction_log) for interaction_log in interaction_logs]
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO interactions (timestamp, document_names, prompt, answer, output_passed, eval_reason, model_name, temperature, top_p)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        interaction_log.timestamp.isoformat(),
-                        interaction_log.document_names,
-                        interaction_log.prompt,
-                        interaction_log.answer,
-                        interaction_log.output_passed,
-                        interaction_log.eval_reason,
-                        interaction_log.model_name,
-                        interaction_log.temperature,
-                        interaction_log.top_p,
-                    )
-                )
+            with self.connection as conn:
+                conn.executemany(_INSERT_INTERACTION_SQL, rows)
                 conn.commit()
-                logger.info(f"Successfully logged interaction for evaluation: '{interaction_log.output_passed}'.")
+                logger.debug("Stored {} interaction rows in one transaction.", len(rows))
         except sqlite3.Error as e:
-            logger.error(f"Failed to log interaction to the database. Error: {e}", exc_info = True)
+            logger.error("Failed to log interaction to the database. Error: {}", e, exc_info = True)
             raise # Re-raise to be handled by the caller (e.g., the UI to show an error message)
 
-    def get_cached_answer(self, cache_key: str) -> Optional[str]:
+    def _to_row(self, interaction_log: InteractionLog) -> Tuple[Any, ...]:
+        """Maps an InteractionLog model to the parameter tuple of the insert statement."""
+        return (
+            interaction_log.timestamp.isoformat(),
+            interaction_log.document_names,
+            interaction_log.prompt if self.store_plain_text else None,
+            interaction_log.answer if self.store_plain_text else None,
+            interaction_log.output_passed,
+            interaction_log.eval_reason,
+            interaction_log.model_name,
+            interaction_log.temperature,
+            interaction_log.top_p,
+            _compress_text(interaction_log.prompt),
+            _compress_text(interaction_log.answer),
+        )
+
+    def fetch_interaction(self, interaction_id: int) -> Optional[InteractionLog]:
+        """
+        Reads a logged interaction record, decompressing prompt and answer.
+
+        Rows written before the compressed columns existed fall back to
+        their plain TEXT columns.
+
+        Args:
+            interaction_id (int): primary key of the 'interactions' row
+
+        Returns:
+            The interaction as InteractionLog model, or None if not found
+
+        Raises:
+            sqlite3.Error: If the query fails
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                SELECT timestamp, document_names, prompt, answer, output_passed, eval_reason, model_name, temperature, top_p, prompt_zstd, answer_zstd
+                FROM interactions WHERE id = ?
+                """,
+                (interaction_id,)
+            )
+            row = cursor.fetchone()
+        except sqlite3.Error as e:
+            logger.error("Failed to fetch interaction {} from the database. Error: {}", interaction_id, e, exc_info = True)
+            raise
+
+        if row is None:
+            return None
+        (timestamp, document_names, prompt, answer, output_passed,
+         eval_reason, model_name, temperature, top_p, prompt_zstd, answer_zstd) = row
+        return InteractionLog(
+            timestamp = datetime.fromisoformat(timestamp),
+            document_names = document_names,
+            prompt = _decompress_text(prompt_zstd) if prompt_zstd is not None else prompt,
+            answer = _decompress_text(answer_zstd) if answer_zstd is not None else answer,
+            output_passed = output_passed,
+            eval_reason = eval_reason,
+            model_name = model_name,
+            temperature = temperature,
+            top_p = top_p,
+        )
+
+    def get_cached_answer(self, cache_key: bytes) -> Optional[str]:
         """
-        Retrieves a cached LLM answer from the database using a cache key.
+        Retrieves a cached LLM answer using a cache key.
+        The in-process LRU is checked first, SQLite only on its miss.
 
         Args:
-            cache_key: SHA-256 hash representing the unique request
+            cache_key: raw hash digest representing the unique request
 
         Returns:
             The cached answer as a string, or None if not found
         """
+        answer = self._mem_get(cache_key)
+        if answer is not None:
+            logger.info("Cache HIT (memory) for key: {}...", cache_key[:5].hex())
+            return answer
+
+        query = _GET_CACHED_ANSWER_SQL
+        params: Tuple[Any, ...] = (cache_key,)
+        cutoff = self._ttl_cutoff()
+        if cutoff is not None:
+            query += " AND created_at >= ?"
+            params += (cutoff,)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT llm_answer FROM interactions_cache WHERE cache_key = ?", (cache_key,))
-                result = cursor.fetchone()
-                if result:
-                    logger.info(f"Cache HIT for key: {cache_key[:10]}...")
-                    return result[0]
-                logger.info(f"Cache MISS for key: {cache_key[:10]}...")
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            result = cursor.fetchone()
+            if result:
+                logger.info("Cache HIT for key: {}...", cache_key[:5].hex())
+                # the memory entry expires with the row, not a full TTL after this lookup
+                self._mem_put(cache_key, result[0], created_at = datetime.fromisoformat(result[1]))
+                return result[0]
+            logger.info("Cache MISS for key: {}...", cache_key[:5].hex())
+            return None
+        except sqlite3.Error as e:
+            logger.error("Failed to query cache. Error: {}", e, exc_info = True)
+            return None # fail safe on error, act as a cache miss
+
+    def set_cached_answer(self,
+                          cache_key: bytes,
+                          answer: str,
+                          semantic_entry: Optional[Tuple[str, str, List[float]]] = None) -> None:
+        """
+        Stores a new LLM answer in the cache, together with its semantic cache
+        entry in one transaction if given.
+
+        Args:
+            cache_key: raw hash digest representing the unique request
+            answer: LLM's generated answer to store
+            semantic_entry: optional (doc_fingerprint, params_key, embedding) of the prompt
+        """
+        self._mem_put(cache_key, answer)
+        try:
+            with self.atomic() as conn:
+                conn.execute(_SET_CACHED_ANSWER_SQL, (cache_key, answer, datetime.now().isoformat()))
+                if semantic_entry is not None:
+                    self._insert_semantic_entry(conn, *semantic_entry, answer)
+                self._delete_expired_entries(conn)
+            logger.success("Successfully cached new answer for key: {}...", cache_key[:5].hex())
+        except sqlite3.Error as e:
+            logger.error("Failed to write to cache. Error: {}", e, exc_info = True)
+            # non-critical error, just log it and move on           
+
+    def _ttl_cutoff(self) -> Optional[str]:
+        """Returns the creation time of the oldest unexpired cache entries, None if entries don't expire."""
+        if self.cache_ttl_seconds is None:
+            return None
+        # ISO timestamps compare in chronological order as strings
+        return (datetime.now() - timedelta(seconds = self.cache_ttl_seconds)).isoformat()
+
+    def _delete_expired_entries(self, conn: sqlite3.Connection) -> None:
+        """Deletes expired rows of both cache tables within the caller's transaction, so they don't grow without bound."""
+        cutoff = self._ttl_cutoff()
+        if cutoff is not None:
+            conn.execute("DELETE FROM interactions_cache WHERE created_at < ?", (cutoff,))
+            conn.execute("DELETE FROM semantic_cache WHERE created_at < ?", (cutoff,))
+
+    def _mem_get(self, cache_key: bytes) -> Optional[str]:
+        """Returns an unexpired answer of the in-process LRU and marks it as recently used."""
+        with self._mem_lock:
+            entry = self._mem_cache.get(cache_key)
+            if entry is None:
+                return None
+            answer, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._mem_cache[cache_key]
                 return None
+            self._mem_cache.move_to_end(cache_key)
+            return answer
+
+    def _mem_put(self, cache_key: bytes, answer: str, created_at: Optional[datetime] = None) -> None:
+        """
+        Adds or refreshes an answer in the in-process LRU, evicts the least recently used ones.
+        An answer read from SQLite passes its row's creation time, so it expires together with the row.
+        """
+        if self.mem_cache_size <= 0:
+            return
+        expires_at = None
+        if self.cache_ttl_seconds is not None:
+            age = (datetime.now() - created_at).total_seconds() if created_at is not None else 0.0
+            expires_at = time.monotonic() + self.cache_ttl_seconds - age
+        with self._mem_lock:
+            self._mem_cache[cache_key] = (answer, expires_at)
+            self._mem_cache.move_to_end(cache_key)
+            while len(self._mem_cache) > self.mem_cache_size:
+                self._mem_cache.popitem(last = False)
+
+    def find_semantic_answer(self,
+                             doc_fingerprint: str,
+                             params_key: str,
+                             embedding: List[float],
+                             threshold: float) -> Optional[str]:
+        """
+        Retrieves the cached answer of the most similar stored prompt for the same
+        document content and LLM parameters, if its cosine similarity reaches the threshold.
+
+        Candidates are scanned on their int8 quantized embeddings, a quarter of the
+        float32 size; only the top ones are reranked on exact float32 embeddings,
+        so the threshold is compared with exact similarities.
+
+        Args:
+            doc_fingerprint: hash of the extracted document text
+            params_key: canonical string of LLM parameters, LLM and embedding model name
+            embedding: embedding vector of the user prompt
+            threshold: minimal cosine similarity to count as hit
+
+        Returns:
+            The cached answer as a string, or None if no similar prompt is found
+        """
+        query = _normalize(np.asarray(embedding, dtype = np.float32))
+        # entries of another embedding dimension (e.g. of a former embedding model) can't be compared, they are misses
+        scan_sql = ("SELECT id, embedding_q8 FROM semantic_cache "
+                    "WHERE doc_fingerprint = ? AND params_key = ? AND length(embedding_q8) = ?")
+        scan_params: Tuple[Any, ...] = (doc_fingerprint, params_key, query.size)
+        cutoff = self._ttl_cutoff()
+        if cutoff is not None:
+            # expires with the exact cache entry of the same answer
+            scan_sql += " AND created_at >= ?"
+            scan_params += (cutoff,)
+        try:
+            conn = self.connection
+            rows = conn.execute(scan_sql, scan_params).fetchall()
+            if not rows:
+                logger.info("Semantic cache MISS: no entries for document {}...", doc_fingerprint[:10])
+                return None
+
+            # coarse int8 scan, scores are proportional to cosine similarities
+            ids = np.array([row[0] for row in rows])
+            codes = np.vstack([np.frombuffer(row[1], dtype = np.int8) for row in rows])
+            scores = codes.astype(np.int32) @ _quantize(query).astype(np.int32)
+            top_ids = ids[np.argsort(scores)[::-1][:SEMANTIC_RERANK_TOP_K]].tolist()
+
+            placeholders = ", ".join("?" * len(top_ids))
+            candidates = conn.execute(
+                f"SELECT embedding, llm_answer FROM semantic_cache WHERE id IN ({placeholders})",
+                top_ids
+            ).fetchall()
         except sqlite3.Error as e:
-            logger.error(f"Failed to query cache. Error: {e}", exc_info = True)
+            logger.error("Failed to query semantic cache. Error: {}", e, exc_info = True)
             return None # fail safe on error, act as a cache miss
 
-    def set_cached_answer(self, cache_key: str, answer: str) -> None:
+        # exact float32 rerank, stored vectors are unit length,
+        # so the dot product is the cosine similarity
+        matrix = np.vstack([np.frombuffer(row[0], dtype = np.float32) for row in candidates])
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] >= threshold:
+            logger.info("Semantic cache HIT with similarity {:.3f} for document {}...", similarities[best], doc_fingerprint[:10])
+            return candidates[best][1]
+        logger.info("Semantic cache MISS: best similarity {:.3f} below {}.", similarities[best], threshold)
+        return None
+
+    def add_semantic_entry(self,
+                           doc_fingerprint: str,
+                           params_key: str,
+                           embedding: List[float],
+                           answer: str) -> None:
         """
-        Stores a new LLM answer in the cache.
+        Stores a prompt embedding with its LLM answer in the semantic cache.
 
         Args:
-            cache_key: SHA-256 hash representing the unique request
+            doc_fingerprint: hash of the extracted document text
+            params_key: canonical string of LLM parameters, LLM and embedding model name
+            embedding: embedding vector of the user prompt
             answer: LLM's generated answer to store
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT OR REPLACE INTO interactions_cache (cache_key, llm_answer, created_at) VALUES (?, ?, ?)",
-                    (cache_key, answer, datetime.now().isoformat())
-                )
-                conn.commit()
-                logger.success(f"Successfully cached new answer for key: {cache_key[:10]}...")
+            with self.atomic() as conn:
+                self._insert_semantic_entry(conn, doc_fingerprint, params_key, embedding, answer)
+                self._delete_expired_entries(conn)
+            logger.success("Successfully added semantic cache entry for document {}...", doc_fingerprint[:10])
         except sqlite3.Error as e:
-            logger.error(f"Failed to write to cache. Error: {e}", exc_info = True)
-            # non-critical error, just log it and move on           
\ No newline at end of file
+            logger.error("Failed to write to semantic cache. Error: {}", e, exc_info = True)
+            # non-critical error, just log it and move on
+
+    def _insert_semantic_entry(self,
+                               conn: sqlite3.Connection,
+                               doc_fingerprint: str,
+                               params_key: str,
+                               embedding: List[float],
+                               answer: str) -> None:
+        """Inserts a semantic cache row with float32 and int8 embedding within the caller's transaction."""
+        vector = _normalize(np.asarray(embedding, dtype = np.float32))
+        conn.execute(
+            "INSERT INTO semantic_cache (doc_fingerprint, params_key, embedding, embedding_q8, llm_answer, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_fingerprint, params_key, vector.tobytes(), _quantize(vector).tobytes(), answer, datetime.now().isoformat())
+        )
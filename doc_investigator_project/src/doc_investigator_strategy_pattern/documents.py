@@ -17,8 +17,9 @@ Classes:
 # Imports
 # ----------
 import abc
+import asyncio
 import os
-from typing import Any, Dict, List, Iterator, Generator
+from typing import Any, Dict, FrozenSet, Iterable, List, Iterator, Generator, NoReturn, Optional, Tuple
 
 import docx
 import fitz  # PyMuPDF
@@ -51,13 +52,14 @@ class PDFLoaderStrategy(DocumentLoaderStrategy):
             with fitz.open(file_path) as doc:
                 content = "\n".join(page.get_text() for page in doc)
                 
-            logger.debug(f"Successfully extracted text from PDF: {os.path.basename(file_path)}")
+            # lazy: basename is only evaluated if a sink accepts the DEBUG record
+            logger.opt(lazy = True).debug("Successfully extracted text from PDF: {}", lambda: os.path.basename(file_path))
             return content
         except fitz.fitz.PyMuPDFError as e:  # specific error class for PyMuPDF (corrupt files, password protection, ...)
-            logger.error(f"Error loading PDF: '{file_path}': {e}", exc_info = True)
+            logger.error("Error loading PDF: '{}': {}", file_path, e, exc_info = True)
             return f"[Error processing PDF: {os.path.basename(file_path)} - The file may be corrupt, password-protected or unreadable.]"
         except (FileNotFoundError) as e:
-            logger.error(f"Error PDF file not found '{file_path}': {e}", exc_info = True)
+            logger.error("Error PDF file not found '{}': {}", file_path, e, exc_info = True)
             return f"[Error PDF file not found: {os.path.basename(file_path)}.]"
 
 class DocxLoaderStrategy(DocumentLoaderStrategy):
@@ -79,14 +81,14 @@ class DocxLoaderStrategy(DocumentLoaderStrategy):
         try:
             doc = docx.Document(file_path)
             content = "\n".join(self._iter_text(doc))
-            logger.debug(f"Successfully extracted text from paragraphs and tables in DOCX: {os.path.basename(file_path)}")
+            logger.opt(lazy = True).debug("Successfully extracted text from paragraphs and tables in DOCX: {}", lambda: os.path.basename(file_path))
             return content
             
         except (FileNotFoundError, docx.opc.exceptions.PackageNotFoundError):
-            logger.error(f"File not found or is not a valid DOCX: '{file_path}'")
+            logger.error("File not found or is not a valid DOCX: '{}'", file_path)
             return f"[Error: File not found or is not a valid DOCX file {os.path.basename(file_path)}]"
         except Exception as e:
-            logger.error(f"Error loading DOCX '{file_path}': {e}", exc_info = True)
+            logger.error("Error loading DOCX '{}': {}", file_path, e, exc_info = True)
             return f"[Error processing DOCX: {os.path.basename(file_path)} - The file may be corrupt or incompatible.]"
 
 class TextLoaderStrategy(DocumentLoaderStrategy):
@@ -97,16 +99,16 @@ class TextLoaderStrategy(DocumentLoaderStrategy):
                 # consumes file's iterator and joins all lines
                 content = "".join(f)
             
-            logger.debug(f"Successful extracted all lines from TXT: {os.path.basename(file_path)}")
+            logger.opt(lazy = True).debug("Successful extracted all lines from TXT: {}", lambda: os.path.basename(file_path))
             return content
         except FileNotFoundError:
-            logger.error(f"File not found: '{file_path}'")
+            logger.error("File not found: '{}'", file_path)
             return f"[Error: File not found: {os.path.basename(file_path)}]"
         except IOError as e:
-            logger.error(f"Error reading TXT '{file_path}': {e}", exc_info = True)
+            logger.error("Error reading TXT '{}': {}", file_path, e, exc_info = True)
             return f"[Error read processing TXT: {os.path.basename(file_path)}]"
         except Exception as e:
-            logger.error(f"An unexpected error occurred with '{file_path}': {e}", exc_info = True)
+            logger.error("An unexpected error occurred with '{}': {}", file_path, e, exc_info = True)
             return f"[Error: An unexpected issue occurred with {os.path.basename(file_path)}]"
 
 class ExcelLoaderStrategy(DocumentLoaderStrategy):
@@ -128,24 +130,40 @@ class ExcelLoaderStrategy(DocumentLoaderStrategy):
                         yield row_text
         
             # generator consumed, building final string
-            logger.debug(f"Successfully extracted text from XLSX: {os.path.basename(file_path)}")
+            logger.opt(lazy = True).debug("Successfully extracted text from XLSX: {}", lambda: os.path.basename(file_path))
             return "\n".join(content_generator())
             
         except FileNotFoundError as e: # openpyxl can raise various errors
-            logger.error(f"Error loading XLSX '{file_path}': {e}", exc_info = True)
+            logger.error("Error loading XLSX '{}': {}", file_path, e, exc_info = True)
             return f"Error processing XLSX: {os.path.basename(file_path)} - File may be corrupt."
         except Exception as e:
-            logger.error(f"Failed to extract text from XLSX {os.path.basename(file_path)}: {e}")
+            logger.error("Failed to extract text from XLSX {}: {}", os.path.basename(file_path), e)
             # Depending on requirements, you might want to return "" or re-raise
             return f"Failed to extract text from XLSX {os.path.basename(file_path)}: {e}"
         finally:
             # workbook closing to release file handle
             if 'workbook' in locals() and workbook is not None:
                 workbook.close() # read_only mode: openpyxl requires explicit closing
-                logger.debug(f"Successfully extracted text and closed workbook: {os.path.basename(file_path)}")
+                logger.opt(lazy = True).debug("Successfully extracted text and closed workbook: {}", lambda: os.path.basename(file_path))
 
 
 # --- Main Processor (Context Class) ---
+def _file_extension(file_path: str) -> str:
+    """
+    Returns the lower-cased extension of a file path including its dot, '' if none.
+
+    Same result as 'os.path.splitext' for the file name part (a leading dot,
+    like '.bashrc', is no extension), but with 'rfind' instead of splitting the path.
+    Like 'splitext', the file name starts after the last 'os.sep' or 'os.altsep' ('/' on Windows).
+    """
+    dot = file_path.rfind('.')
+    separator = file_path.rfind(os.sep)
+    if os.altsep:
+        separator = max(separator, file_path.rfind(os.altsep))
+    if dot <= separator + 1:
+        return ''
+    return file_path[dot:].lower()
+
 class DocumentProcessor:
     """
     Context class uses the strategy to validate and process documents.
@@ -153,26 +171,37 @@ class DocumentProcessor:
     Initialized with a set of supported file types and uses a dictionary
     of loader strategies to perform the actual text extraction.
     """
-    def __init__(self, supported_extensions: List[str]):
+    def __init__(self, supported_extensions: Iterable[str]):
         """
         Initializes the DocumentProcessor with a mapping of extensions to loaders.
 
         Args:
-            supported_extensions (List[str]): A list of supported file extensions
-                                              (e.g., ['.pdf', '.docx'])
+            supported_extensions (Iterable[str]): The supported file extensions, e.g. a list
+                                                  or frozenset (like ['.pdf', '.docx'])
         """
-        self.supported_extensions: List[str] = supported_extensions
+        # materialized once, a given iterator is consumed only here
+        self.supported_extensions: Tuple[str, ...] = tuple(supported_extensions)
+        # hashed O(1) membership test instead of scanning the list per file
+        self._extension_set: FrozenSet[str] = frozenset(ext.lower() for ext in self.supported_extensions)
         self._strategies: Dict[str, DocumentLoaderStrategy] = {
             '.pdf': PDFLoaderStrategy(),
             '.docx': DocxLoaderStrategy(),
             '.txt': TextLoaderStrategy(),
             '.xlsx': ExcelLoaderStrategy(),
         }
-        logger.info(f"DocumentProcessor initialized for types: {', '.join(supported_extensions)}")
+        logger.info("DocumentProcessor initialized for types: {}", ', '.join(self.supported_extensions))
+
+    def _raise_unsupported(self, file_path: str, file_extension: str) -> NoReturn:
+        """Logs and raises the exception for a file with an unsupported extension."""
+        file_name = os.path.basename(file_path)
+        error_msg = f"Unsupported file type: '{file_extension}' in file '{file_name}'."
+        logger.warning(error_msg)
+        raise InvalidFileTypeException(error_msg)
 
     def validate_files(self, files: List[Any]) -> None:
         """
         Validates that all uploaded files have a supported extension.
+        Used standalone on upload, where no file content shall be loaded yet.
 
         Args:
             files (List[Any]): A list of file-like objects (from Gradio)
@@ -180,44 +209,95 @@ class DocumentProcessor:
         Raises:
             InvalidFileTypeException: If any file has an unsupported extension
         """
-        logger.info(f"Validating {len(files)} uploaded files...")
+        logger.info("Validating {} uploaded files...", len(files))
         for file in files:
-            file_name = os.path.basename(file.name)
-            _, file_extension = os.path.splitext(file_name)
-            if file_extension.lower() not in self.supported_extensions:
-                error_msg = f"Unsupported file type: '{file_extension}' in file '{file_name}'."
-                logger.warning(error_msg)
-                raise InvalidFileTypeException(error_msg)
-        logger.success(f"All {len(files)} files passed validation.")
+            file_extension = _file_extension(file.name)
+            if file_extension not in self._extension_set:
+                self._raise_unsupported(file.name, file_extension)
+        logger.success("All {} files passed validation.", len(files))
 
-    def process_files(self, files: List[Any]) -> str:
+    def _load_one(self, file_path: str, file_extension: str) -> Optional[str]:
         """
-        Extracts text from a list of pre-validated Gradio file objects.
+        Extracts the text of a single validated file, headed by its file name.
 
-        This method iterates through the files, selects the appropriate loading
-        strategy based on file extension, and aggregates the content.
+        Args:
+            file_path (str): path of the file
+            file_extension (str): its lower-cased extension, derived once by the caller
+
+        Returns:
+            Optional[str]: text section of the file, or None if no loader is implemented for it
+        """
+        file_name: str = os.path.basename(file_path)
+        strategy = self._strategies.get(file_extension)
+        # safeguard check, a configured type may have no loader implemented
+        if not strategy:
+            logger.warning("No loader strategy found for validated file '{}'. Skipping.", file_name)
+            return None
+
+        text = strategy.load(file_path)
+        return f"--- CONTENT FROM {file_name} ---\n{text}"
+
+    def extract(self, files: List[Any]) -> str:
+        """
+        Validates and extracts text from a list of Gradio file objects in a single pass.
+
+        Each file's name and extension are derived once, its extension is
+        validated and the matching loading strategy extracts its content,
+        before the loop continues with the next file.
 
         Args:
-            files (List[Any]): list of validated file-like objects
+            files (List[Any]): list of file-like objects
 
         Returns:
             str: combined text content of all files, with headers indicating source
+
+        Raises:
+            InvalidFileTypeException: If any file has an unsupported extension
         """
-        logger.info(f"Processing {len(files)} validated files to extract text...")
+        logger.info("Validating and extracting text of {} files...", len(files))
         all_texts: List[str] = []
         for file in files:
             file_path: str = file.name
-            file_name: str = os.path.basename(file_path)
-            _, file_extension = os.path.splitext(file_path)
+            file_extension = _file_extension(file_path)
+            if file_extension not in self._extension_set:
+                self._raise_unsupported(file_path, file_extension)
+            text = self._load_one(file_path, file_extension)
+            if text is not None:
+                all_texts.append(text)
 
-            strategy = self._strategies.get(file_extension.lower())
-            # safeguard check, though validation should prevent this behaviour
-            if not strategy:
-                logger.warning(f"No loader strategy found for validated file '{file_name}'. Skipping.")
-                continue
+        logger.success("Text extraction from all files complete.")
+        return "\n\n".join(all_texts)
+
+    async def aprocess_files(self, files: List[Any]) -> str:
+        """
+        Extracts text from a list of pre-validated Gradio file objects concurrently in worker threads,
+        the parsing libraries release the GIL in their C extensions.
+        The files are validated once before, by 'validate_files' in the 'process_inputs' action,
+        so the workers only load them.
 
-            text = strategy.load(file_path)
-            all_texts.append(f"--- CONTENT FROM {file_name} ---\n{text}")
+        Args:
+            files (List[Any]): list of validated file-like objects
 
+        Returns:
+            str: combined text content of all files in upload order, with headers indicating source
+        """
+        logger.info("Extracting text of {} validated files concurrently...", len(files))
+        texts = await asyncio.gather(*(
+            asyncio.to_thread(self._load_one, file.name, _file_extension(file.name)) for file in files
+        ))
         logger.success("Text extraction from all files complete.")
-        return "\n\n".join(all_texts)
\ No newline at end of file
+        return "\n\n".join(text for text in texts if text is not None)
+
+    def process_files(self, files: List[Any]) -> str:
+        """
+        Extracts text from a list of pre-validated Gradio file objects.
+
+        Kept for existing callers, delegates to the single pass 'extract' method.
+
+        Args:
+            files (List[Any]): list of validated file-like objects
+
+        Returns:
+            str: combined text content of all files, with headers indicating source
+        """
+        return self.extract(files)
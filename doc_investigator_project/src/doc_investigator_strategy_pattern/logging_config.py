@@ -23,51 +23,75 @@ from .config import Config
 # Coding
 # ----------
 
-def setup_logging(config: Config) -> None:
-    """
-    Configures the application-wide Loguru logger.
-    Retention policy is to keep as maximum youngest 5 log files.
+LOG_DIR = Path("logs")
 
-    Removes default Loguru handler and setup 2 new ones:
-    -  A console handler (stderr) for real-time, colorized output during
-        development and interactive sessions. It's configured to show logs
-        from the INFO level and above.
-    -  A file handler that writes logs to 'logs/app.log'. This file log
-        is more verbose (DEBUG level), includes comprehensive details
-        (like module and function name), and has built-in rotation and
-        retention policies for production use.
 
-    This setup should be called once at the very beginning of the application's
-    entry point.
+def remove_old_log_files(config: Config) -> None:
     """
-
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
+    Applies the retention policy to the log directory, keeps as maximum youngest 5 log files.
+    With several Uvicorn workers, the parent process calls it once before the workers start,
+    so no worker deletes the fresh log file of another one.
+    """
+    LOG_DIR.mkdir(exist_ok=True)
 
     # --- retention policy ---
     # logic runs *before* new logger is added,
     # check ensures directory state before creating new file
     try:
-        # get all log files, sort them by modification time (newest first)
-        log_files = sorted(
-            [os.path.join(log_dir, f) for f in os.listdir(log_dir) if f.startswith("app_session_") and f.endswith(".log")],
-            key=os.path.getmtime,
-            reverse=True
-        )
+        # get all log files, sort them by modification time (newest first);
+        # scandir entries reuse the stat data of the directory iteration where
+        # the OS provides it, instead of one getmtime() stat call per file
+        with os.scandir(LOG_DIR) as entries:
+            log_files = [
+                entry for entry in entries
+                if entry.name.startswith("app_session_") and entry.name.endswith(".log")
+            ]
+        log_files.sort(key = lambda entry: entry.stat().st_mtime, reverse = True)
         
         # having config.MAX_LOG_FILES=5 or more, the 5th newest is at index 4,
         # any file from index 5 onwards is older and will be deleted                     
         files_to_delete = log_files[config.MAX_LOG_FILES - 1:]
         if files_to_delete:
             logger.info(f"Log Retention: Found {len(log_files)} logs. Max is {config.MAX_LOG_FILES}. Cleaning up oldest ones.")
-            for f in files_to_delete:
-                os.remove(f)
-                logger.info(f"Log Retention: Removed old log file '{os.path.basename(f)}'.")
+            for entry in files_to_delete:
+                os.remove(entry.path)
+                logger.info(f"Log Retention: Removed old log file '{entry.name}'.")
                 
     except Exception as e:
         # don't want log cleanup to crash app, so just print a warning.
         logger.warning("[WARNING] Could not perform log file cleanup...", exc_info=e)
         pass
+
+
+def setup_logging(config: Config) -> None:
+    """
+    Configures the application-wide Loguru logger.
+    Retention policy is to keep as maximum youngest 5 log files.
+
+    Removes default Loguru handler and setup 2 new ones:
+    -  A console handler (stderr) for real-time, colorized output during
+        development and interactive sessions. It's configured to show logs
+        from the INFO level and above.
+    -  A file handler that writes logs to 'logs/app.log'. This file log
+        is more verbose (DEBUG level), includes comprehensive details
+        (like module and function name), and has built-in rotation and
+        retention policies for production use.
+
+    Both sinks write synchronously (no 'enqueue'): Loguru already serializes
+    sink access with an internal lock, so no record is pickled through a queue.
+    The lock guards one process only, so with several Uvicorn workers each worker
+    writes, rotates and retains its own log file, named by its process id.
+
+    This setup should be called once at the very beginning of the application's
+    entry point.
+    """
+    if config.SERVER_WORKERS > 1:
+        # retention has been applied by the parent process before the workers started
+        LOG_DIR.mkdir(exist_ok=True)
+        log_file_name = f"app_session_{{time:YYYY-MM-DD_HH-mm-ss}}_pid{os.getpid()}.log"
+    else:
+        remove_old_log_files(config)
+        log_file_name = "app_session_{time:YYYY-MM-DD_HH-mm-ss}.log"
     
     # --- loguru configuration ---
     log_format = (
@@ -85,13 +109,13 @@ def setup_logging(config: Config) -> None:
         level = "INFO",
         format = log_format,
         colorize = True,
-        enqueue = True,      # to be thread-safe
+        enqueue = False,     # sinks are thread-safe by loguru's lock; no per-record pickling
         backtrace = True,
         diagnose = False     # False in production for security
     )
 
     # file log handler
-    log_file_path = log_dir / "app_session_{time:YYYY-MM-DD_HH-mm-ss}.log"
+    log_file_path = LOG_DIR / log_file_name
     logger.add(
         log_file_path,
         level = "DEBUG",
@@ -99,7 +123,7 @@ def setup_logging(config: Config) -> None:
         rotation = "10 MB",  # rotate log file when it reaches 10 MB
         retention = 5,       # keep max 5 log files
         compression = "zip", # compress old log files
-        enqueue = True,      # make logging thread-safe
+        enqueue = False,     # the file belongs to this process only, loguru's lock guards it already
         serialize = False,   # True for JSON-structured logs
         diagnose = False     # make tracebacks pickleable; 'True' not working in Python native traceback
     )
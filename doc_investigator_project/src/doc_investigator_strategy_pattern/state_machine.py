@@ -22,14 +22,16 @@ not a Pydantic object (means no <state.attribute> implementation).
 # Imports
 # ----------
 import os
+import re
+import asyncio
 import sqlite3
 import hashlib
-import json
+import unicodedata
 from pydantic import BaseModel, Field
-from typing import Tuple, Optional, List, Dict, Any
+from typing import Tuple, Optional, List, Dict, Any, AsyncGenerator
 
 from burr.core import Action, State, ApplicationBuilder, default, when
-from burr.core.action import action
+from burr.core.action import action, streaming_action
 # with our own pydantic basemodel we need a typing for our state object
 from burr.integrations.pydantic import PydanticTypingSystem
 from opentelemetry import trace
@@ -41,10 +43,44 @@ from .database import InteractionLog, DatabaseManager
 from .documents import DocumentProcessor, InvalidFileTypeException
 from .services import GeminiService
 
+# BLAKE3 hashes large document texts several times faster than SHA-256,
+# SHA-256 of hashlib is the fallback if the package is not installed
+try:
+    from blake3 import blake3 as _new_hasher
+except ImportError:
+    _new_hasher = hashlib.sha256
+
 # ----------
 # Coding
 # ----------
 
+# canonical, fixed precision string of LLM params for cache keys;
+# any new LLM param must be added here explicitly, each change creates new cache entries
+_PARAM_FMT = "t={t:.4f};p={p:.4f}"
+
+_WHITESPACE_RUN = re.compile(r"\s+")
+
+def _normalize_prompt(prompt: str) -> str:
+    """
+    Returns the prompt's form for cache keys: Unicode NFC with collapsed whitespace,
+    so visually equal prompts share a key. The original prompt is sent to the LLM.
+    """
+    return _WHITESPACE_RUN.sub(" ", unicodedata.normalize("NFC", prompt)).strip()
+
+def _params_str(llm_params: Dict[str, float], config: Config) -> str:
+    """Returns the canonical LLM params string, missing params count as their config default."""
+    return _PARAM_FMT.format(
+        t = llm_params.get("temperature", config.TEMPERATURE),
+        p = llm_params.get("top_p", config.TOP_P)
+    )
+
+def _semantic_params_key(params_str: str, config: Config) -> str:
+    """
+    Returns the scope of semantic cache entries: LLM params and model, and the embedding model,
+    as embeddings of different models are not comparable.
+    """
+    return params_str + config.LLM_MODEL_NAME + config.EMBEDDING_MODEL_NAME
+
 # Creation of pydantic model to inform about internal states and data structure
 # It is used by the PydanticTypingSystem to manage the state between actions and
 # for initialization, but the object passed into the action function itself is the
@@ -75,7 +111,11 @@ class InvestigationState(BaseModel):
     outcome: Optional[str] = None
     classification: Optional[str] = None
     hit: Optional[bool] = None
-    cache_key: Optional[str] = None
+    cache_key: Optional[bytes] = None   # raw digest, half the size of its hex form
+    # hash of extracted_text, computed once after extraction
+    doc_fingerprint: Optional[str] = None
+    # semantic cache lookup vector, set only if the semantic cache is enabled
+    prompt_embedding: Optional[List[float]] = None
 
     # required for pydantic,
     # allows arbitrary types like Gradio's file object
@@ -84,16 +124,20 @@ class InvestigationState(BaseModel):
 
 @action(
     reads = [],
-    writes = ["files", "prompt", "llm_params", "error_message", "outcome"]
+    writes = ["files", "prompt", "llm_params", "doc_names", "error_message", "outcome"]
 )
 def process_inputs(
     state: InvestigationState,
     doc_processor: DocumentProcessor,
+    config: Config,
     files: List[Any],
     prompt: str,
     llm_params: Dict[str, float],
 ) -> Tuple[dict, InvestigationState]:
-    """Validates files and saves all initial inputs to the state."""
+    """
+    Validates files and prompt and saves all initial inputs to the state.
+    Invalid prompts fail here, before any document is extracted.
+    """
     
     # remember input values
     base_update = {"files": files, "prompt": prompt, "llm_params": llm_params}
@@ -106,12 +150,27 @@ def process_inputs(
             outcome = "failure"
         )
         return {}, new_state
+    if not prompt or not prompt.strip():
+        new_state = state.update(
+            **base_update,
+            error_message = "Please enter a prompt to continue.",
+            outcome = "failure"
+        )
+        return {}, new_state
+    if len(prompt) > config.MAX_PROMPT_CHARACTERS:
+        new_state = state.update(
+            **base_update,
+            error_message = f"Your prompt is too long. Please shorten it to at most {config.MAX_PROMPT_CHARACTERS} characters.",
+            outcome = "failure"
+        )
+        return {}, new_state
     try:
         doc_processor.validate_files(files)
         logger.success("State machine: File validation successful.")
-        # update state with all inputs and success
+        # update state with all inputs, the validated files' names and success
         new_state = state.update(
             **base_update,
+            doc_names = ", ".join(os.path.basename(f.name) for f in files),
             outcome = "success"
         )
         return {}, new_state
@@ -126,78 +185,123 @@ def process_inputs(
 
 @action(
     reads = ["files", "config.MAX_CONTEXT_CHARACTERS"],
-    writes = ["extracted_text", "doc_names"]
+    writes = ["extracted_text", "doc_fingerprint"]
 )
-def process_documents(
+async def process_documents(
     state: InvestigationState,
     doc_processor: DocumentProcessor,
     config: Config
 ) -> Tuple[dict, InvestigationState]:
-    """Action to process documents and extract text."""
-    full_text = doc_processor.process_files(state["files"])
-    doc_names = ", ".join([os.path.basename(f.name) for f in state["files"]])
+    """Action to process documents concurrently, extract text and fingerprint it for the cache actions."""
+    full_text = await doc_processor.aprocess_files(state["files"])
     if len(full_text) > config.MAX_CONTEXT_CHARACTERS:
         full_text = full_text[:config.MAX_CONTEXT_CHARACTERS]
         
-    new_state = state.update(extracted_text = full_text, doc_names = doc_names)
+    doc_fingerprint = _new_hasher(full_text.encode('utf-8')).hexdigest()
+    new_state = state.update(extracted_text = full_text, doc_fingerprint = doc_fingerprint)
     return {}, new_state
 
 @action(
-    reads = ["extracted_text", "prompt", "llm_params", "config"],
-    writes = ["cache_key", "llm_answer", "hit"]
+    reads = ["doc_fingerprint", "prompt", "llm_params", "config"],
+    writes = ["cache_key", "llm_answer", "hit", "prompt_embedding"]
 )
-def check_cache(
-    state: InvestigationState, db_manager: DatabaseManager, config: Config
+async def check_cache(
+    state: InvestigationState,
+    db_manager: DatabaseManager,
+    ai_service: GeminiService,
+    config: Config
 ) -> Tuple[dict, InvestigationState]:
-    """Generates a cache key and checks if the answer exists in DB."""
+    """
+    Generates a cache key and checks if the answer exists in DB.
+    On an exact miss and if enabled, looks for an answer of a semantically similar prompt.
+    """
     prompt = state["prompt"]
     llm_params = state["llm_params"]
     # stable string representation of LLM params
-    params_str = json.dumps(llm_params, sort_keys = True)
+    params_str = _params_str(llm_params, config)
     
-    # sha256 cache key is a hash of all unique inputs
-    key_material = (
-        state["extracted_text"] + prompt + params_str + config.LLM_MODEL_NAME
-    ).encode('utf-8')
-    cache_key = hashlib.sha256(key_material).hexdigest()
+    # cache key is a hash of all unique inputs, the document text is
+    # represented by its fingerprint instead of hashing it again
+    doc_fingerprint = state["doc_fingerprint"]
+    hasher = _new_hasher()
+    for part in (doc_fingerprint, _normalize_prompt(prompt), params_str, config.LLM_MODEL_NAME):
+        hasher.update(part.encode('utf-8'))
+    cache_key = hasher.digest()
     
     cached_answer = db_manager.get_cached_answer(cache_key)
     
     if cached_answer:
-        # Cache HIT: put answer in the state and return "hit"
-        new_state = state.update(llm_answer = cached_answer, cache_key = cache_key, hit = True)
+        # Cache HIT: put answer in the state and return "hit";
+        # an embedding of an earlier run of this app must not reach the cache update
+        new_state = state.update(llm_answer = cached_answer, cache_key = cache_key, hit = True,
+                                 prompt_embedding = None)
         return {}, new_state
     
+    if config.SEMANTIC_CACHE_ENABLED:
+        params_key = _semantic_params_key(params_str, config)
+        # the embedding request is blocking, keep it off the event loop shared by all sessions
+        embedding = await asyncio.to_thread(ai_service.embed_text, prompt)
+        if embedding is not None:
+            similar_answer = db_manager.find_semantic_answer(
+                doc_fingerprint, params_key, embedding, config.SEMANTIC_CACHE_THRESHOLD
+            )
+            if similar_answer:
+                new_state = state.update(llm_answer = similar_answer, cache_key = cache_key, hit = True,
+                                         prompt_embedding = None)
+                return {}, new_state
+        # semantic MISS: keep vector to store the new answer later
+        new_state = state.update(cache_key = cache_key, hit = False, prompt_embedding = embedding)
+        return {}, new_state
+
     # Cache MISS: save key for later and return "miss"
-    new_state = state.update(cache_key = cache_key, hit = False)
+    new_state = state.update(cache_key = cache_key, hit = False, prompt_embedding = None)
     return {}, new_state
 
-@action(
-    reads = ["extracted_text", "prompt", "llm_params"],
+@streaming_action(
+    reads = ["extracted_text", "prompt", "llm_params", "doc_fingerprint"],
     writes = ["llm_answer"]
 )
-def generate_answer(
+async def generate_answer(
     state: InvestigationState,
     ai_service: GeminiService
-) -> Tuple[dict, InvestigationState]:
-    """Action to call the AI service and get an answer."""
-    answer = ai_service.get_answer(
+) -> AsyncGenerator[Tuple[dict, Optional[State]], None]:
+    """
+    Action to stream the answer of the AI service.
+    Yields the growing answer for the UI, the final answer is written to the state at end of stream.
+    """
+    answer = ""
+    async for answer in ai_service.astream_answer(
         full_text_context = state["extracted_text"],
         user_prompt = state["prompt"],
         temperature = state["llm_params"]["temperature"],
         top_p = state["llm_params"]["top_p"],
-    )
-    new_state = state.update(llm_answer = answer)
-    return {}, new_state
+        doc_fingerprint = state["doc_fingerprint"],   # hashed once after extraction, not per question
+    ):
+        yield {"llm_answer": answer}, None
+    yield {"llm_answer": answer}, state.update(llm_answer = answer)
 
 @action(
-    reads = ["cache_key", "llm_answer"],
+    reads = ["cache_key", "llm_answer", "llm_params", "doc_fingerprint", "prompt_embedding"],
     writes = []
 )
-def update_cache(state: InvestigationState, db_manager: DatabaseManager) -> Tuple[dict, InvestigationState]:
-    """Saves the newly generated answer to the cache if it is a 'real' one."""
+def update_cache(
+    state: InvestigationState,
+    db_manager: DatabaseManager,
+    config: Config
+) -> Tuple[dict, InvestigationState]:
+    """
+    Saves the newly generated answer to the cache if it is a 'real' one,
+    exact and semantic cache entries are written in one transaction.
+    """
     if state.get("is_real_answer"):
-        db_manager.set_cached_answer(state["cache_key"], state["llm_answer"])
+        if config.SEMANTIC_CACHE_ENABLED and state.get("prompt_embedding"):
+            params_key = _semantic_params_key(_params_str(state["llm_params"], config), config)
+            db_manager.set_cached_answer(
+                state["cache_key"], state["llm_answer"],
+                semantic_entry = (state["doc_fingerprint"], params_key, state["prompt_embedding"])
+            )
+        else:
+            db_manager.set_cached_answer(state["cache_key"], state["llm_answer"])
     return {}, state
 
 @action(
@@ -296,33 +400,58 @@ def process_human_evaluation(
 def terminal_state(state: InvestigationState) -> Tuple[dict, InvestigationState]:
     return {}, state
 
+def bind_actions(
+    config: Config,
+    db_manager: DatabaseManager,
+    doc_processor: DocumentProcessor,
+    ai_service: GeminiService,
+) -> Dict[str, Action]:
+    """
+    Binds the services to the actions of the state machine.
+
+    Burr validates the declared reads against the action's source code on every bind,
+    so the bound actions are meant to be reused by all applications of the same services.
+
+    Returns:
+        Dict[str, Action]: bound actions by their name in the state machine graph
+    """
+    return {
+        "process_inputs": process_inputs.bind(doc_processor = doc_processor, config = config),
+        "process_documents": process_documents.bind(doc_processor = doc_processor, config = config),
+        "check_cache": check_cache.bind(db_manager = db_manager, ai_service = ai_service, config = config),
+        "generate_answer": generate_answer.bind(ai_service = ai_service),
+        "update_cache": update_cache.bind(db_manager = db_manager, config = config),
+        "classify_answer": classify_answer.bind(config = config),
+        "auto_log_and_terminate": auto_log_and_terminate.bind(config = config, db_manager = db_manager),
+        "await_human_evaluation": await_human_evaluation,
+        "process_human_evaluation": process_human_evaluation.bind(config = config, db_manager = db_manager),
+        "error": terminal_state,        # terminal failure state
+        "end": terminal_state,          # terminal success state
+    }
+
 def build_application(
     config: Config,
     db_manager: DatabaseManager,
     doc_processor: DocumentProcessor,
     ai_service: GeminiService,
+    actions: Optional[Dict[str, Action]] = None,
 ) -> "Application":
-    return (
+    # actions bound before by 'bind_actions' for the same services, else bound here
+    if actions is None:
+        actions = bind_actions(config, db_manager, doc_processor, ai_service)
+    builder = (
         ApplicationBuilder()
         .with_typing(PydanticTypingSystem(InvestigationState))  # informs about shape and schema of state
         .with_state(InvestigationState())                       # Pydantic model initialisation
-        .with_tracker(                                          # for OpenTelemetry tracer integration:
+    )
+    if config.TRACE_ENABLED:
+        builder = builder.with_tracker(                         # for OpenTelemetry tracer integration:
             project = "doc-investigator",                       # all state machine actions are traced 
-            params = {"storage_dir": "./.burr"}                 # as spans automatically; burr UI as backend
-        )
-        .with_actions(
-            process_inputs = process_inputs.bind(doc_processor = doc_processor),
-            process_documents = process_documents.bind(doc_processor = doc_processor, config = config),
-            check_cache = check_cache.bind(db_manager = db_manager, config = config),
-            generate_answer = generate_answer.bind(ai_service = ai_service),
-            update_cache = update_cache.bind(db_manager = db_manager),
-            classify_answer = classify_answer.bind(config = config),
-            auto_log_and_terminate = auto_log_and_terminate.bind(config = config, db_manager = db_manager),
-            await_human_evaluation = await_human_evaluation,
-            process_human_evaluation = process_human_evaluation.bind(config = config, db_manager = db_manager),
-            error = terminal_state,        # terminal failure state
-            end = terminal_state,          # terminal success state
+            params = {"storage_dir": config.TRACE_STORAGE_DIR}  # as spans automatically; burr UI as backend
         )
+    return (
+        builder
+        .with_actions(**actions)
         .with_transitions(
             ("process_inputs", "process_documents", when(outcome = "success")),
             ("process_inputs", "error", when(outcome = "failure")),
@@ -12,25 +12,15 @@ to serve the Gradio-based user interface.
 # Imports
 # ----------
 
-# Fix for numpy warnings,
-# MUST be at the absolute top of the file, before any other imports,
-# ... nevertheless, is not always working during pytest run,
-# why? https://github.com/numpy/numpy/issues/26414
-# seems to be an issue between WSL ubuntu, MS Windows and numpy
-import warnings
-warnings.filterwarnings(    
-    "ignore",
-    message = ".*does not match any known type.*",
-    category = UserWarning,
-    module = "numpy._core.getlimits"
-)
-
-import gradio as gr
+import functools
 import getpass
+import importlib
 import os
 import sys
-from loguru import logger
-from typing import TYPE_CHECKING
+import threading
+import warnings
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Tuple, TYPE_CHECKING
 
 # ----------
 # Coding
@@ -38,27 +28,20 @@ from typing import TYPE_CHECKING
 
 # Allows app to run as script from 'src' dir.
 # Adds parent dir 'src' to Python path, making 'doc_investigator_strategy' package importable.
+# Guarded, so re-imports (e.g. by Uvicorn workers) don't grow the search path.
 #sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-try:
-    from doc_investigator_strategy_pattern.app import AppUI
-    from doc_investigator_strategy_pattern.config import Config
-    from doc_investigator_strategy_pattern.database import DatabaseManager
-    from doc_investigator_strategy_pattern.documents import DocumentProcessor
-    from doc_investigator_strategy_pattern.services import GeminiService
-    from doc_investigator_strategy_pattern.logging_config import setup_logging
-    from doc_investigator_strategy_pattern.state_machine import build_application
-except ImportError as e:
-    print(f"FATAL: A required module could not be imported. "
-          f"Please ensure you are running this script from 'src' directory "
-          f"and all dependencies are installed. Error: {e}")
-    sys.exit(1)
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
 
+# Heavy packages (gradio, pandas, google-generativeai, burr) are imported inside
+# the functions that need them, so importing this module stays cheap,
+# e.g. for test collection or '--help' of tooling.
 
 # TYPE_CHECKING is True only during static type checking,
 # preventing circular imports at runtime
 if TYPE_CHECKING:
+    import gradio as gr
     from doc_investigator_strategy_pattern.app import AppUI
     from doc_investigator_strategy_pattern.config import Config
     from doc_investigator_strategy_pattern.database import DatabaseManager
@@ -66,35 +49,99 @@ if TYPE_CHECKING:
     from doc_investigator_strategy_pattern.services import GeminiService
 
 
-def initialize_app() -> gr.Blocks:
+# read-only Uvicorn options, SSL key and certificate files can be set by environment variables
+SERVER_OPTIONS = MappingProxyType({
+    "host": "127.0.0.1",
+    "port": 7861,
+    "loop": "auto",
+    "http": "auto",
+    "ssl_keyfile": os.environ.get("SSL_KEY", "./key.pem"),
+    "ssl_certfile": os.environ.get("SSL_CERT", "./cert.pem"),
+})
+
+
+def _import_numpy() -> None:
     """
-    Initializes and wires together all application components.
+    Imports numpy before gradio or pandas do it, ignoring its 'does not match any known type' warning.
+    The filter is only active during this import, not for the whole process.
+    Issue: https://github.com/numpy/numpy/issues/26414,
+    seems to be an issue between WSL ubuntu, MS Windows and numpy.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore",
+            message = ".*does not match any known type.*",
+            category = UserWarning,
+            module = "numpy._core.getlimits"
+        )
+        import numpy  # noqa: F401
 
-    This function follows the Dependency Injection pattern, creating instances
-    of services and passing them to the components that depend on them.
-    Note: The Burr state machine app is not built here; it's built on-demand in the AppUI.
 
-    Returns:
-        gr.Blocks: A configured Gradio application instance.
+# modules imported on demand by the functions below
+LAZY_MODULES = (
+    "gradio",
+    "fastapi",
+    "uvicorn",
+    "loguru",
+    "doc_investigator_strategy_pattern.app",
+    "doc_investigator_strategy_pattern.config",
+    "doc_investigator_strategy_pattern.database",
+    "doc_investigator_strategy_pattern.documents",
+    "doc_investigator_strategy_pattern.logging_config",
+    "doc_investigator_strategy_pattern.services",
+    "doc_investigator_strategy_pattern.state_machine",
+)
 
-    Raises:
-        SystemExit: If any critical initialization step fails.
+# CI sets DOC_INV_EAGER_IMPORT, so a broken deferred import fails on import of this module,
+# not on the first request in production
+if os.environ.get("DOC_INV_EAGER_IMPORT"):
+    _import_numpy()
+    try:
+        for module_name in LAZY_MODULES:
+            importlib.import_module(module_name)
+    except ImportError as e:
+        print(f"FATAL: A required module could not be imported. "
+              f"Please ensure all dependencies are installed. Error: {e}")
+        sys.exit(1)
+
+
+class LazyComponent:
     """
+    Proxy of an app component, created by its factory on first attribute access.
+    Lets the Gradio server bind its port before database and LLM client are set up,
+    the first request pays for their creation once.
+    """
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
 
-    logger.info("Starting Document Investigator application initialisation...")
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._factory(), name)
+
+
+@functools.lru_cache(maxsize = 1)
+def get_config() -> "Config":
+    """Returns the application configuration, loaded once."""
+    from doc_investigator_strategy_pattern.config import Config
+    return Config()
 
-    try:
-        config = Config()
-        setup_logging(config)
-    
-        # which LLM in use?
-        logger.info(f"Configuration loaded successfully, as LLM: {config.LLM_MODEL_NAME}")
-    except Exception as e:
-        logger.critical(f"Failed to load configuration. Aborting. Error: {e}", exc_info = True)
-        raise SystemExit(1) from e
+
+@functools.lru_cache(maxsize = 1)
+def get_api_key() -> str:
+    """
+    Returns Google's Gemini API key from the environment or an interactive prompt.
+    Without a terminal, e.g. started as service or container, it fails fast instead of
+    waiting for an input that never comes.
+
+    Raises:
+        SystemExit: If no API key could be read.
+    """
+    from loguru import logger
 
     # by now: only Google API Key for LLM available
     api_key = os.environ.get('GOOGLE_API_KEY')
+    if not api_key and not sys.stdin.isatty():
+        logger.critical("GOOGLE_API_KEY environment variable not found and no terminal for a password prompt. Aborting.")
+        raise SystemExit(1)
     if not api_key:
         logger.warning("GOOGLE_API_KEY environment variable not found. Falling back to password prompt.")
         try:
@@ -104,28 +151,115 @@ def initialize_app() -> gr.Blocks:
         except Exception as e:
             logger.critical(f"Could not read Google's LLM API key. Aborting. Error: {e}", exc_info = True)
             raise SystemExit(1) from e
+    return api_key
+
+
+# components created by 'get_services'; lru_cache would let concurrent first requests
+# run the factory twice, each with its own semaphore and in-memory cache
+_services: Optional[Tuple["DatabaseManager", "DocumentProcessor", "GeminiService"]] = None
+_services_lock = threading.Lock()
+
+
+def get_services() -> Tuple["DatabaseManager", "DocumentProcessor", "GeminiService"]:
+    """
+    Creates the heavy app components once, on the first request that needs them.
+    Concurrent first requests wait for the one creating them (double-checked lock),
+    later calls return them without locking.
+
+    Returns:
+        Tuple[DatabaseManager, DocumentProcessor, GeminiService]: the shared components
 
-    # app components
+    Raises:
+        RuntimeError: If a core component can't be initialized.
+    """
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                _services = _create_services()
+    return _services
+
+
+def _create_services() -> Tuple["DatabaseManager", "DocumentProcessor", "GeminiService"]:
+    """Creates database manager, document processor and Gemini service, see 'get_services'."""
+    from loguru import logger
+    from doc_investigator_strategy_pattern.database import DatabaseManager
+    from doc_investigator_strategy_pattern.documents import DocumentProcessor
+    from doc_investigator_strategy_pattern.services import GeminiService
+
+    config = get_config()
     try:
-        db_manager = DatabaseManager(db_path = config.DB_FILE)
+        db_manager = DatabaseManager(
+            db_path = config.DB_FILE,
+            store_plain_text = config.DB_STORE_PLAIN_TEXT,
+            mem_cache_size = config.MEM_CACHE_SIZE,
+            cache_ttl_seconds = config.CACHE_TTL_SECONDS
+        )
         logger.success("DatabaseManager initialized successfully.")
 
         doc_processor = DocumentProcessor(supported_extensions = config.SUPPORTED_FILE_TYPES)
         logger.success("DocumentProcessor initialized successfully.")
 
-        ai_service = GeminiService(api_key = api_key, config = config)
+        ai_service = GeminiService(api_key = get_api_key(), config = config)
         logger.success("GeminiService initialized successfully.")
+    except Exception as e:
+        logger.critical(f"Failed to initialize a core component. Error: {e}", exc_info = True)
+        raise RuntimeError("Failed to initialize the app components.") from e
+
+    return db_manager, doc_processor, ai_service
+
+
+@functools.lru_cache(maxsize = 1)
+def initialize_app() -> "gr.Blocks":
+    """
+    Initializes and wires together all application components.
+
+    This function follows the Dependency Injection pattern, creating instances
+    of services and passing them to the components that depend on them.
+    Database manager, document processor and Gemini service are injected as
+    lazy proxies, created on the first request by 'get_services'.
+    Note: The Burr state machine app is not built here; it's built on-demand in the AppUI.
+    The result is cached, further calls return the same Gradio app.
+
+    Returns:
+        gr.Blocks: A configured Gradio application instance.
+
+    Raises:
+        SystemExit: If any critical initialization step fails.
+    """
+    from loguru import logger
 
+    _import_numpy()
+    try:
+        from doc_investigator_strategy_pattern.app import AppUI
+        from doc_investigator_strategy_pattern.logging_config import setup_logging
+    except ImportError as e:
+        print(f"FATAL: A required module could not be imported. "
+              f"Please ensure you are running this script from 'src' directory "
+              f"and all dependencies are installed. Error: {e}")
+        sys.exit(1)
+
+    logger.info("Starting Document Investigator application initialisation...")
+
+    try:
+        config = get_config()
+        setup_logging(config)
+    
+        # which LLM in use?
+        logger.info(f"Configuration loaded successfully, as LLM: {config.LLM_MODEL_NAME}")
     except Exception as e:
-        logger.critical(f"Failed to initialize a core component. Aborting. Error: {e}", exc_info = True)
+        logger.critical(f"Failed to load configuration. Aborting. Error: {e}", exc_info = True)
         raise SystemExit(1) from e
 
+    # read key at startup, a password prompt can't be answered during a request
+    get_api_key()
+
     # Gradio App UI, injecting dependencies
     app_ui = AppUI(
         config = config,
-        db_manager = db_manager,
-        doc_processor = doc_processor,
-        ai_service = ai_service,
+        db_manager = LazyComponent(lambda: get_services()[0]),
+        doc_processor = LazyComponent(lambda: get_services()[1]),
+        ai_service = LazyComponent(lambda: get_services()[2]),
     )
     logger.success("Application UI created successfully.")
 
@@ -133,26 +267,55 @@ def initialize_app() -> gr.Blocks:
     return app_ui.app
 
 
-# var name 'app' is default Uvicorn looks for,
-# but skipped uvicorn, because gradio stucked in loading
-app = initialize_app()
+def create_server_app() -> Any:
+    """
+    Mounts the Gradio app on a FastAPI app that Uvicorn serves.
+
+    Returns:
+        FastAPI: The ASGI app serving the Gradio UI at the root path.
+    """
+    _import_numpy()
+    import gradio as gr
+    from fastapi import FastAPI
+
+    return gr.mount_gradio_app(FastAPI(), initialize_app(), path = "/")
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Creates the ASGI app on first access of 'main.server_app' (PEP 562),
+    as done by Uvicorn workers importing the app by name.
+    Plain imports of this module don't open the database or ask for the API key.
+    """
+    if name == "server_app":
+        server_app = create_server_app()
+        # cached as module attribute, further lookups don't reach this hook
+        globals()[name] = server_app
+        return server_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    if app:
-        logger.info("Launching application with Gradio's built-in server using HTTPS...")
-        # use Gradio's own launch method and passes the SSL parameters to it,
-        # creates an encrypted (HTTPS/WSS) connection that will bypass firewall's web filter, so,
-        # gradio didn't stuck in loading (but private certificates have to be explicitly accepted)
-        app.launch(
-            server_name = "127.0.0.1",
-            server_port = 7861,
-            ssl_keyfile = "./key.pem",
-            ssl_certfile = "./cert.pem",
-            # tells Gradio's internal HTTP client (used for health checks, etc.)
-            # to NOT verify SSL certificates. Necessary when using
-            # a self-signed certificate for localhost
-            ssl_verify = False
-        )
-    else:
-        logger.critical("Application failed to initialize and will not start.")    
+    import uvicorn
+    from loguru import logger
+
+    config = get_config()
+    if config.SERVER_WORKERS > 1:
+        from doc_investigator_strategy_pattern.logging_config import remove_old_log_files
 
+        # each worker process imports 'main:server_app' and builds its own app,
+        # the parent only supervises them; log retention runs once, here, before they start
+        remove_old_log_files(config)
+        logger.info("Launching application with Uvicorn ({} workers) using HTTPS...", config.SERVER_WORKERS)
+        # Uvicorn's 'auto' loop and http choose uvloop and httptools if installed;
+        # SSL creates an encrypted (HTTPS/WSS) connection that will bypass firewall's web filter, so,
+        # gradio didn't stuck in loading (but private certificates have to be explicitly accepted);
+        # the API key has to be set as environment variable, workers have no terminal for a prompt
+        uvicorn.run("main:server_app", workers = config.SERVER_WORKERS, **SERVER_OPTIONS)
+    else:
+        server_app = create_server_app()
+        if server_app:
+            logger.info("Launching application with Uvicorn (1 worker) using HTTPS...")
+            uvicorn.run(server_app, workers = 1, **SERVER_OPTIONS)
+        else:
+            logger.critical("Application failed to initialize and will not start.")
@@ -11,39 +11,50 @@ See: https://burr.dagworks.io/reference/application/#graph-apis
 # ----------
 # Imports
 # ----------
+import functools
 import os
 import sys
 
-# adds parent dir to path to allow package imports
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-
-from doc_investigator_strategy_pattern.app import AppUI
-from doc_investigator_strategy_pattern.config import Config
-from doc_investigator_strategy_pattern.database import DatabaseManager
-from doc_investigator_strategy_pattern.documents import DocumentProcessor
-from doc_investigator_strategy_pattern.services import GeminiService
-from doc_investigator_strategy_pattern.state_machine import build_application
+# adds parent dir to path to allow package imports, if not already there
+SRC_DIR = os.path.abspath(os.path.dirname(__file__))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
 
 # ----------
 # Coding
 # ----------
 
-def generate_diagram():
-    """Builds the application and generates the state machine diagram."""
-    
-    # no real API key necessary
-    os.environ["GOOGLE_API_KEY"] = "dummy_key_for_visualization"
+@functools.lru_cache(maxsize = 1)
+def _build_burr_app():
+    """Builds the Burr application once, further diagram renders reuse it."""
+
+    # rendering calls no LLM, so a placeholder is enough; setdefault keeps a real key and
+    # lets the shared loader run without its password prompt, e.g. headless in CI
+    os.environ.setdefault("GOOGLE_API_KEY", "dummy_key_for_visualization")
+
+    # imported here, the script is a one-shot tool and importing it shall stay cheap
+    from main import get_api_key
+    from doc_investigator_strategy_pattern.config import Config
+    from doc_investigator_strategy_pattern.database import DatabaseManager
+    from doc_investigator_strategy_pattern.documents import DocumentProcessor
+    from doc_investigator_strategy_pattern.services import GeminiService
+    from doc_investigator_strategy_pattern.state_machine import build_application
 
     config = Config()
     db_manager = DatabaseManager(db_path = config.DB_FILE)
     doc_processor = DocumentProcessor(supported_extensions = config.SUPPORTED_FILE_TYPES)
-    ai_service = GeminiService(api_key = os.environ["GOOGLE_API_KEY"], config = config)
+    ai_service = GeminiService(api_key = get_api_key(), config = config)
     burr_app = build_application(
         config = config,
         db_manager = db_manager,
         doc_processor = doc_processor,
         ai_service = ai_service,
     )
+    return burr_app
+
+def generate_diagram():
+    """Builds the application and generates the state machine diagram."""
+    burr_app = _build_burr_app()
 
     # creates .png   
     burr_app.visualize(
@@ -7,9 +7,26 @@ This file is automatically discovered by pytest and is used to define
 hooks and fixtures that apply to all tests.
 """
 
+import dataclasses
+import os
+import pytest
 import warnings
+from loguru import logger
 from pydantic.warnings import PydanticDeprecatedSince20, PydanticDeprecatedSince211
 
+# (message, category) pairs of warnings raised by dependencies, not by the project code
+IGNORED_WARNINGS = (
+    ("websockets.legacy is deprecated", DeprecationWarning),
+    ("websockets.server.WebSocketServerProtocol is deprecated", DeprecationWarning),
+    ("builtin type SwigPyPacked has no __module__ attribute", DeprecationWarning),
+    ("builtin type SwigPyObject has no __module__ attribute", DeprecationWarning),
+    ("builtin type swigvarlink has no __module__ attribute", DeprecationWarning),
+    # Filter for Pydantic
+    ("Support for class-based `config` is deprecated, use ConfigDict instead.*", PydanticDeprecatedSince20),
+    # Filter for Burr integration's use of `model_fields`
+    ("Accessing the 'model_fields' attribute on the instance is deprecated.*", PydanticDeprecatedSince211),
+)
+
 def pytest_configure(config):
     """
     A pytest hook that is called after command-line options have been parsed
@@ -18,49 +35,52 @@ def pytest_configure(config):
     Most reliable place to programmatically configure warning filters,
     as it runs before any tests or application code is imported.
     
-    Filter warning settings of pyproject.toml file are not working in this project.
+    Filter warning settings of pyproject.toml file are not working in this project
+    for these dependency warnings; only Gradio's event loop warning is filtered there.
     """
-    warnings.filterwarnings(
-        "ignore",
-        message = "websockets.legacy is deprecated",
-        category = DeprecationWarning
-    )
-    warnings.filterwarnings(
-        "ignore",
-        message = "There is no current event loop",
-        category = DeprecationWarning
-    )
-    warnings.filterwarnings(
-        "ignore",
-        message = "websockets.server.WebSocketServerProtocol is deprecated",
-        category = DeprecationWarning
-    )
-    warnings.filterwarnings(
-        "ignore",
-        message = "builtin type SwigPyPacked has no __module__ attribute",
-        category = DeprecationWarning
-    )
-    warnings.filterwarnings(
-        "ignore",
-        message = "builtin type SwigPyObject has no __module__ attribute",
-        category = DeprecationWarning
-    )
-    warnings.filterwarnings(
-        "ignore",
-        message = "builtin type swigvarlink has no __module__ attribute",
-        category = DeprecationWarning
-    )
+    for message, category in IGNORED_WARNINGS:
+        warnings.filterwarnings("ignore", message = message, category = category)
 
-    # Filter for Pydantic
-    warnings.filterwarnings(
-        "ignore",
-        message = "Support for class-based `config` is deprecated, use ConfigDict instead.*",
-        category = PydanticDeprecatedSince20
-    )
+@pytest.fixture
+def caplog(caplog):
+    """
+    Overrides pytest's caplog fixture to also capture loguru messages,
+    loguru doesn't use the standard logging module pytest hooks into.
+    """
+    handler_id = logger.add(caplog.handler, format = "{message}")
+    yield caplog
+    logger.remove(handler_id)
 
-    # Filter for Burr integration's use of `model_fields`
-    warnings.filterwarnings(
-        "ignore",
-        message = "Accessing the 'model_fields' attribute on the instance is deprecated.*",
-        category = PydanticDeprecatedSince211  # Matches the category pytest identifies
-    )
\ No newline at end of file
+@pytest.fixture(scope = "module")
+def vcr_config():
+    """
+    Configures pytest-recording for tests marked with 'vcr',
+    API keys are never written to the recorded cassettes.
+    """
+    return {
+        "filter_headers": ["authorization", "x-goog-api-key"],
+        "filter_query_parameters": ["key"],
+    }
+
+@pytest.fixture(scope = "session")
+def base_config(tmp_path_factory):
+    """
+    Provides the default Config, built once per session (resp. xdist worker).
+    Config is a frozen dataclass, tests derive variants by 'dataclasses.replace'.
+    Burr tracking data of tests enabling tracing goes to a temporary directory, not the working directory.
+    """
+    from doc_investigator_strategy_pattern.config import Config
+    return Config(TRACE_STORAGE_DIR = str(tmp_path_factory.mktemp("burr")))
+
+@pytest.fixture(scope = "session")
+def real_ai_service(base_config):
+    """
+    Provides a real GeminiService instance for live testing, shared by all test modules.
+    It uses the REST transport, gRPC calls can't be recorded as cassettes.
+    """
+    # imported on first use only, test runs without live tests don't load the Gemini SDK here
+    from doc_investigator_strategy_pattern.services import GeminiService
+    config = dataclasses.replace(base_config, GEMINI_TRANSPORT = "rest")
+    # replayed cassettes don't need a valid key, their recorded key is filtered
+    api_key = os.environ.get("GOOGLE_API_KEY", "replay-only-key")
+    return GeminiService(api_key = api_key, config = config)
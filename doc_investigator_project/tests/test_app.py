@@ -13,8 +13,10 @@ interacts with the state machine correctly.
 import pytest
 import gradio as gr
 import sys
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from doc_investigator_strategy_pattern import app as app_module
 from doc_investigator_strategy_pattern.app import AppUI
 from doc_investigator_strategy_pattern.documents import InvalidFileTypeException
 from doc_investigator_strategy_pattern.database import InteractionLog
@@ -23,55 +25,135 @@ from doc_investigator_strategy_pattern.database import InteractionLog
 # Coding
 # ----------
 
-# get rid off warning filter to suppress DeprecationWarning from Gradio
-pytestmark = [
-    pytest.mark.filterwarnings(
-        "ignore:There is no current event loop:DeprecationWarning:gradio.utils"
-    )
-]
+# config values read by the AppUI,
+# TEMPERATURE and TOP_P are the default values of LLM params for reset button test
+CONFIG_DEFAULTS = {
+    "LLM_MODEL_NAME": "mock-model-name",
+    "TEMPERATURE": 0.2,
+    "TOP_P": 0.95,
+    "MAX_CONCURRENT_LLM": 8,
+    "DB_FILE": "mock_investigations.db",
+    "SUPPORTED_FILE_TYPES": [".pdf", ".docx", ".txt"],
+}
 
-@pytest.fixture
-def mock_dependencies():
-    """Provides a dictionary of mock services. Remains a synchronous fixture."""
-    config_mock = MagicMock()
-    config_mock.LLM_MODEL_NAME = "mock-model-name"
-    # default values of LLM params for reset button test
-    config_mock.TEMPERATURE = 0.2
-    config_mock.TOP_P = 0.95
+# type of Gradio's update objects, no-op updates are checked against it
+UpdateObjectType = type(gr.update())
+
+class FakeDBManager:
+    """Database manager stand-in, the UI only hands it over to the (patched) Burr app."""
+
+
+class FakeAIService:
+    """Gemini service stand-in, the UI only hands it over to the (patched) Burr app."""
+
+
+class FakeDocProcessor:
+    """Document processor stand-in, records validated uploads and raises a configured error."""
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.validated_files = []
+        self.validation_error = None
+
+    def validate_files(self, files) -> None:
+        self.validated_files.append(files)
+        if self.validation_error:
+            raise self.validation_error
+
+
+@pytest.fixture(scope = "module")
+def mock_config():
+    """
+    Provides a config stand-in with all values read by the AppUI, set once for all tests.
+    Config is only read, never asserted on, so a plain namespace is sufficient.
+    """
+    return SimpleNamespace(**CONFIG_DEFAULTS)
+
+@pytest.fixture(scope = "module")
+def mock_dependencies(mock_config):
+    """
+    Provides a dictionary of fake services, shared by all tests of this module.
+    Fakes only have the methods the UI calls, so a handler using any other method fails.
+    Remains a synchronous fixture.
+    """
     return {
-        "config": config_mock,
-        "db_manager": MagicMock(),
-        "doc_processor": MagicMock(),
-        "ai_service": MagicMock(),
+        "config": mock_config,
+        "db_manager": FakeDBManager(),
+        "doc_processor": FakeDocProcessor(),
+        "ai_service": FakeAIService(),
     }
 
-@pytest.fixture
+@pytest.fixture(scope = "module")
 def app_ui(mock_dependencies):
-    """Provides an AppUI instance with all backend services mocked."""
+    """
+    Provides an AppUI instance with all backend services mocked,
+    the Gradio Blocks are built once per module.
+    """
     return AppUI(**mock_dependencies)
 
+@pytest.fixture(autouse = True)
+def reset_app_ui(app_ui, mock_dependencies):
+    """
+    Resets the shared fakes and config values after each test,
+    so no test sees another's calls or changes.
+    """
+    yield
+    mock_dependencies["doc_processor"].reset()
+    vars(mock_dependencies["config"]).update(CONFIG_DEFAULTS)
+
 # --- 
 # Tests of 'Investigation' tab (Burr-related)
 # ---
 
-# patch `build_application` here to control Burr app instance on demand
-# in UI tests without calling real state machine logic
-@patch('doc_investigator_strategy_pattern.app.build_application')
-@pytest.mark.asyncio
-async def test_handle_investigation_success(mock_build_application, app_ui):
+def mock_halt(action_name, chunks = ()):
     """
-    Tests the main investigation handler, ensuring it calls Burr and updates the UI correctly.
+    Creates the (action, streaming result) tuple of Burr's `astream_result`,
+    the streaming result yields the given partial answers.
     """
-    # Arrange
-    mock_burr_app = MagicMock()
-    mock_build_application.return_value = mock_burr_app
+    action = SimpleNamespace(name = action_name)
+
+    class MockStreamingResult:
+        async def __aiter__(self):
+            for chunk in chunks:
+                yield {"llm_answer": chunk}
+        get = AsyncMock(return_value = ({}, None))
 
+    return action, MockStreamingResult()
+
+@pytest.fixture(scope = "module", autouse = True)
+def mock_build_application():
+    """
+    Patches `build_application` once for all tests of this module to control Burr app instance
+    on demand in UI tests without calling real state machine logic.
+    """
+    with patch.object(app_module, 'build_application') as build_application:
+        yield build_application
+
+@pytest.fixture
+def mock_burr_app(mock_build_application):
+    """
+    Provides the Burr app mock the AppUI builds on investigation, shared setup of the investigation tests.
+    """
+    burr_app = MagicMock()
+    mock_build_application.reset_mock()
+    mock_build_application.return_value = burr_app
     # to avoid ValueError - not enough values to unpack:
-    # configure mock's `run` method to return 3-tuple like real method,
-    # contents don't matter...
-    mock_burr_app.run.return_value = (MagicMock(), MagicMock(), MagicMock())
+    # configure mock's async `arun` method to return 3-tuple like real method,
+    # contents don't matter, the handler discards them
+    burr_app.arun = AsyncMock(return_value = (object(), object(), object()))
+    return burr_app
+
+@pytest.mark.asyncio(loop_scope = "module")
+async def test_handle_investigation_success(mock_burr_app, mock_build_application, app_ui):
+    """
+    Tests the main investigation handler, ensuring it streams the answer from Burr and updates the UI correctly.
+    """
+    # Arrange
+    # flow halts at answer generation and streams partial answers
+    mock_burr_app.astream_result = AsyncMock(return_value = mock_halt("generate_answer", ["This is"]))
     
-    mock_files = [MagicMock()]
+    mock_files = [SimpleNamespace(name = "doc1.pdf")]   # file stand-in, services are mocked
     mock_prompt = "test prompt"
     temperature_from_ui = 0.75
     top_p_from_ui = 0.85
@@ -86,11 +168,12 @@ async def test_handle_investigation_success(mock_build_application, app_ui):
     }
 
     # Act
+    outputs = [output async for output in app_ui._handle_investigation(
+        mock_files, mock_prompt, temperature_from_ui, top_p_from_ui
+    )]
     (answer_update, panel_update,
      doc_names_out, prompt_out, answer_out,
-     temp_state_out, top_p_state_out) = app_ui._handle_investigation(
-        mock_files, mock_prompt, temperature_from_ui, top_p_from_ui
-    )
+     temp_state_out, top_p_state_out, burr_app_state_out) = outputs[-1]
 
     # Assert
     # verify burr_app correctly build and run
@@ -98,13 +181,19 @@ async def test_handle_investigation_success(mock_build_application, app_ui):
         config = app_ui.config,
         db_manager = app_ui.db_manager,
         doc_processor = app_ui.doc_processor,
-        ai_service = app_ui.ai_service
+        ai_service = app_ui.ai_service,
+        actions = app_ui._burr_actions
     )
-    mock_burr_app.run.assert_called_once()
-    call_inputs = mock_burr_app.run.call_args.kwargs['inputs']
+    mock_burr_app.astream_result.assert_awaited_once()
+    call_inputs = mock_burr_app.astream_result.call_args.kwargs['inputs']
     assert call_inputs['prompt'] == mock_prompt
     assert call_inputs['llm_params']['temperature'] == temperature_from_ui
+    mock_burr_app.arun.assert_awaited_once()
     
+    # verify partial answer streamed before final UI update
+    assert len(outputs) == 2, "Handler should yield one partial and one final update"
+    assert outputs[0][0]['value'] == "This is", "Partial answer not streamed to the answer box"
+
     # verify UI components updated correctly based on mocked state
     assert answer_update['value'] == "This is a real answer.", "Extracted investigation text and ai service not as expected"
     assert panel_update['visible'] is True, "Investigation panel is not updated resp. its not visible"
@@ -113,22 +202,18 @@ async def test_handle_investigation_success(mock_build_application, app_ui):
     assert answer_out == "This is a real answer.", "LLM output state result not as expected"
     assert temp_state_out == temperature_from_ui, "Wrong temperature value returned for state storage"
     assert top_p_state_out == top_p_from_ui, "Wrong top-p value returned for state storage"
+    assert burr_app_state_out is mock_burr_app, "Halted Burr app should be handed to the session state"
+    assert not hasattr(app_ui, "burr_app"), "Burr app must not be shared by the sessions on the AppUI"
 
 
-@patch('doc_investigator_strategy_pattern.app.build_application')
-@pytest.mark.asyncio
-async def test_handle_investigation_auto_logged(mock_build_application, app_ui):
+@pytest.mark.asyncio(loop_scope = "module")
+async def test_handle_investigation_auto_logged(mock_burr_app, app_ui):
     """
     Tests the handler when Burr returns a non-answer that was auto-logged.
     """
     # Arrange
-    mock_burr_app = MagicMock()
-    mock_build_application.return_value = mock_burr_app
-
-    # to avoid ValueError - not enough values to unpack:
-    # configure mock's `run` method to return 3-tuple like real method,
-    # contents don't matter...
-    mock_burr_app.run.return_value = (MagicMock(), MagicMock(), MagicMock())
+    # flow finished without streaming, e.g. on a cached predefined answer
+    mock_burr_app.astream_result = AsyncMock(return_value = mock_halt("end"))
     
     mock_burr_app.state = {
         "llm_answer": "Unknown",
@@ -137,38 +222,40 @@ async def test_handle_investigation_auto_logged(mock_build_application, app_ui):
     }
 
     # Act
-    (answer_update, panel_update, *other_states) = app_ui._handle_investigation(
-        [MagicMock()], "prompt", 0.5, 0.5
-    )
+    outputs = [output async for output in app_ui._handle_investigation(
+        [SimpleNamespace(name = "doc1.pdf")], "prompt", 0.5, 0.5
+    )]
+    (answer_update, panel_update, *other_states) = outputs[-1]
 
     # Assert
+    mock_burr_app.arun.assert_not_awaited()
+    assert len(outputs) == 1, "Handler should yield the final update only"
     assert answer_update['value'] == "Unknown", "Default answer for unknown is not there"
     assert panel_update['visible'] is False, "Evaluation analysis panel should be hidden"
-    assert all(s is None for s in other_states), "Not all state variables are correctly reset to None"
+    assert other_states == [None] * 6, "Not all state variables are correctly reset to None"
 
     
-@pytest.mark.asyncio
-async def test_handle_evaluation_calls_burr_step(app_ui, mock_dependencies):
+def test_handle_evaluation_calls_burr_step(app_ui, mock_dependencies):
     """
-    Tests that the evaluation handler calls burr_app.step() correctly.
+    Tests that the evaluation handler steps the Burr app of the session correctly.
     """
     # Arrange
     choice = "✔️ Yes..."
     reason = "A valid reason."
-    # place a mock Burr app into AppUI instance to simulate
-    # state after an investigation has been run and halted
-    app_ui.burr_app = MagicMock()
+    # mock Burr app of the session state simulates
+    # an investigation that has been run and halted
+    burr_app = MagicMock()
     
     # Act
     result_tuple = app_ui._handle_evaluation(
-        "doc.txt", "prompt", "answer", choice, reason, 0.5, 0.5
+        "doc.txt", "prompt", "answer", choice, reason, 0.5, 0.5, burr_app
     )
     
     # Assert
-    assert app_ui.burr_app.step.call_count == 2, "App code hasn't called step() twice, as it is expected"
+    assert burr_app.step.call_count == 2, "App code hasn't called step() twice, as it is expected"
     
     # inspect first call ensures inputs were correct
-    first_call_inputs = app_ui.burr_app.step.call_args_list[0].kwargs['inputs']
+    first_call_inputs = burr_app.step.call_args_list[0].kwargs['inputs']
     assert first_call_inputs['evaluation_choice'] == choice, "Evaluation choice buttons are not set"
     assert first_call_inputs['evaluation_reason'] == reason , "Evaluation reason txt window component not there"
     
@@ -178,9 +265,9 @@ async def test_handle_evaluation_calls_burr_step(app_ui, mock_dependencies):
     assert result_tuple[3]['visible'] is False, "Evaluation analysis panel 'evaluation_panel' is not hidden"
     
     # sliders receive a "no-op" update
-    UpdateObjectType = type(gr.update())
     assert isinstance(result_tuple[9], UpdateObjectType), "temperature slider reset not updated correctly, no-op"
     assert isinstance(result_tuple[10], UpdateObjectType), "top-p slider reset not updated correctly, no-op"
+    assert result_tuple[11] is None, "Finished Burr app is not removed from the session state"
 
 # ---
 # Tests of 'Evaluation Analysis' tab (not Burr related)
@@ -204,98 +291,88 @@ def test_reset_llm_button_functionality(app_ui):
     assert temp_output == 0.2, "temperature output doesn't match default 0.2"
     assert top_p_output == 0.95, "top-p output doesn't match default 0.95"
     
-@pytest.mark.asyncio
-async def test_handle_file_validation_failure(app_ui, mock_dependencies):
+def test_handle_file_validation_failure(app_ui, mock_dependencies, mocker):
     """
     Tests that the file validation handler catches an exception and returns None.
     """
     # Arrange
-    mock_files = [MagicMock()]
-    mock_dependencies["doc_processor"].validate_files.side_effect = InvalidFileTypeException("Bad file")
+    mock_files = [SimpleNamespace(name = "doc1.pdf")]   # file stand-in, services are mocked
+    mock_dependencies["doc_processor"].validation_error = InvalidFileTypeException("Bad file")
     
-    # Act
     # We patch 'gradio.Warning' to prevent it from trying to render in a non-UI context
-    with patch('gradio.Warning') as mock_gr_warning:
-        result = app_ui._handle_file_validation(mock_files)
+    mock_gr_warning = mocker.patch.object(gr, 'Warning')
+
+    # Act
+    result = app_ui._handle_file_validation(mock_files)
 
     # Assert
     assert result is None, "The handler should return None to clear the Gradio component."
+    assert mock_dependencies["doc_processor"].validated_files == [mock_files], "Uploaded files were not validated"
     mock_gr_warning.assert_called_once(), "gr.Warning should have been called to inform the user."
 
 
-@patch('doc_investigator_strategy_pattern.app.analysis.generate_profile_report')
-def test_handle_profile_generation_success(mock_generate_report, app_ui):
-    """
-    Test Case: Successful profile generation in the UI.
-    Checks that the handler returns the correct HTML, state object, and enabled button.
-    """
-    # Arrange
-    # - Create a mock ProfileReport object that our mocked analysis function will return.
-    mock_profile = MagicMock()
-    mock_profile.to_html.return_value = "<h1>Mock Report HTML</h1>"
-    mock_generate_report.return_value = mock_profile
-
-    # Act
-    html_output, state_output, button_update = app_ui._handle_profile_generation()
-
-    # Assert
-    mock_generate_report.assert_called_once()
-    assert html_output == "<h1>Mock Report HTML</h1>", "Report mock is not available"
-    assert state_output is mock_profile, "Report mock profile is not as expected"
-    assert button_update == gr.update(interactive=True), "Report button for creation is not interactive"
+def make_profile_report() -> MagicMock:
+    """Creates a ProfileReport stand-in rendering a fixed HTML snippet."""
+    profile = MagicMock()
+    profile.to_html.return_value = "<h1>Mock Report HTML</h1>"
+    return profile
 
-@patch('doc_investigator_strategy_pattern.app.analysis.generate_profile_report', return_value=None)
-def test_handle_profile_generation_failure(mock_generate_report, app_ui):
+@pytest.mark.parametrize("profile, expect_html, expect_interactive", [
+    (make_profile_report(), "<h1>Mock Report HTML</h1>", True),
+    (None, "Error:", False),
+], ids = ["success", "failure"])
+def test_handle_profile_generation(profile, expect_html, expect_interactive, app_ui):
     """
-    Test Case: Failed profile generation in the UI (e.g., file not found).
-    Checks that the handler returns an error message and a disabled button.
+    Test Case: Profile generation in the UI, successful or failed (e.g., file not found).
+    Checks that the handler returns the report HTML resp. an error message,
+    the report as state object and the matching button state.
     """
     # Arrange
-    # - The mock is already configured to return None by the patch decorator.
-
-    # Act
-    html_output, state_output, button_update = app_ui._handle_profile_generation()
+    # - The analysis function returns the report, or None if profiling failed.
+    with patch.object(app_module.analysis, 'generate_profile_report', return_value = profile) as mock_generate_report:
+        # Act
+        html_output, state_output, button_update = app_ui._handle_profile_generation()
 
     # Assert
     mock_generate_report.assert_called_once()
-    assert "Error:" in html_output, "Failure message of profiling report creation does not include 'Error:' string"
-    assert state_output is None, "Output state of creation failure is not 'None'"
-    assert button_update == gr.update(interactive=False), "Report button for creation is interactive"
-
-@patch('doc_investigator_strategy_pattern.app.os.makedirs')
-@patch('doc_investigator_strategy_pattern.app.gr.Info')
-def test_handle_export_html_success(mock_gr_info, mock_makedirs, app_ui):
+    assert expect_html in html_output, f"Report HTML output does not include '{expect_html}'"
+    assert state_output is profile, "Output state of report creation is not as expected"
+    assert button_update == gr.update(interactive = expect_interactive), \
+        f"Report button interactivity is not {expect_interactive}"
+
+@pytest.mark.parametrize("profile, expected_popup", [
+    (MagicMock(), "Info"),
+    (None, "Warning"),
+], ids = ["success", "no_report"])
+def test_handle_export_html(profile, expected_popup, app_ui, mocker):
     """
-    Test Case: Successful HTML export.
-    Checks that the report's to_file method is called with a correctly formatted path.
+    Test Case: HTML export of a generated report, or an export before a report is generated.
+    Checks that the report's to_file method is called with a correctly formatted path
+    and the user receives a confirmation popup, otherwise a warning is shown.
     """
     # Arrange
-    mock_profile = MagicMock()
-    
-    # Act
-    app_ui._handle_export_html(mock_profile)
-
-    # Assert
-    mock_makedirs.assert_called_once_with("reports", exist_ok=True)
-    # checks report file is saved in 'reports' dir with correct format
-    mock_profile.to_file.assert_called_once()
-    saved_path = mock_profile.to_file.call_args.args[0]
-    assert saved_path.startswith("reports/profiling_report_"), "Profiling report name structure is not correct"
-    assert saved_path.endswith(".html"), "Profiling report type is not '.html'"
-    # checks user receives a confirmation popup
-    mock_gr_info.assert_called_once()
-
-@patch('doc_investigator_strategy_pattern.app.gr.Warning')
-def test_handle_export_html_no_report(mock_gr_warning, app_ui):
-    """
-    Test Case: User tries to export before a report is generated.
-    Checks that a warning is shown.
-    """
-    # Arrange
-    # - The state passed to the handler is None.
+    mock_makedirs = mocker.patch.object(app_module.os, 'makedirs')
+    popups = {
+        "Info": mocker.patch.object(app_module.gr, 'Info'),
+        "Warning": mocker.patch.object(app_module.gr, 'Warning'),
+    }
 
     # Act
-    app_ui._handle_export_html(None)
+    app_ui._handle_export_html(profile)
 
     # Assert
-    mock_gr_warning.assert_called_once_with("No report has been generated yet. Please generate the report first.")
\ No newline at end of file
+    popups.pop(expected_popup).assert_called_once()
+    for other_popup in popups.values():
+        other_popup.assert_not_called()
+    if profile is None:
+        mock_makedirs.assert_not_called()
+        app_module.gr.Warning.assert_called_once_with(
+            "No report has been generated yet. Please generate the report first."
+        )
+    else:
+        mock_makedirs.assert_called_once_with("reports", exist_ok=True)
+        # checks report file is saved in 'reports' dir with correct format
+        profile.to_file.assert_called_once()
+        saved_path = profile.to_file.call_args.args[0]
+        assert saved_path.startswith("reports/profiling_report_"), "Profiling report name structure is not correct"
+        assert saved_path.endswith(".html"), "Profiling report type is not '.html'"
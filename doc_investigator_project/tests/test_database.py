@@ -8,6 +8,7 @@ Unit tests for the DatabaseManager class.
 # Imports
 # ----------
 import sqlite3
+import time
 import pytest
 import sys
 
@@ -18,13 +19,28 @@ from doc_investigator_strategy_pattern.database import DatabaseManager, Interact
 # ----------
 
 # Pytest fixture to create a fresh DatabaseManager instance for each test function
-# using a temporary database file.
+# using an in-memory database, no file I/O; migration and journal tests use tmp_path files.
 @pytest.fixture
-def db_manager(tmp_path):
-    """Provides a DatabaseManager instance with a temporary database."""
-    # tmp_path is a pytest fixture that provides a temporary directory (Path object)
-    db_path = tmp_path / "test.db"
-    return DatabaseManager(db_path = str(db_path))
+def db_manager():
+    """Provides a DatabaseManager instance with a fresh in-memory database."""
+    return DatabaseManager(db_path = ":memory:")
+
+@pytest.fixture(scope = "module")
+def sample_log():
+    """
+    Provides a validated interaction record, shared by the tests of this module.
+    Tests needing other values derive a variant by `model_copy(update = ...)`, without re-validation.
+    """
+    return InteractionLog(
+        document_names = "test.pdf, report.docx",
+        prompt = "What is the summary?",
+        answer = "This is the summary.",
+        output_passed = "yes",
+        eval_reason = "The summary was concise and accurate.",
+        model_name = "gemini-2.5-pro",
+        temperature = 0.5,
+        top_p = 0.9
+    )
 
 def test_initialization_creates_table_and_columns(db_manager):
     """
@@ -32,7 +48,7 @@ def test_initialization_creates_table_and_columns(db_manager):
     are created upon initialization.
     """
     # Assert
-    with sqlite3.connect(db_manager.db_path) as conn:
+    with db_manager.connection as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='interactions'")
         assert cursor.fetchone() is not None, "The 'interactions' table was not created."
@@ -48,32 +64,35 @@ def test_initialization_creates_table_and_columns(db_manager):
                             'eval_reason',
                             'model_name',
                             'temperature',
-                            'top_p']
+                            'top_p',
+                            'prompt_zstd',
+                            'answer_zstd']
         assert all(col in columns for col in expected_columns), "Not all expected columns were created."
         assert 'evaluation' not in columns, "Old 'evaluation' column should have been renamed."
 
-def test_log_interaction_inserts_correct_data(db_manager):
+def test_connections_apply_read_tuning_pragmas(tmp_path):
+    """
+    Tests that each connection opened by the manager uses the tuned page cache and mmap size.
+    """
+    # memory-mapped I/O needs a database file
+    db_manager = DatabaseManager(db_path = str(tmp_path / "tuned.db"))
+    with db_manager.connection as conn:
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536, "Page cache size not tuned"
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0, "Memory-mapped I/O not enabled"
+
+def test_log_interaction_inserts_correct_data(db_manager, sample_log):
     """
     Tests if the log_interaction method correctly inserts a row into the database.
     """
     # Arrange
     # inserted mock data
-    test_log_entry = InteractionLog(
-        document_names = "test.pdf, report.docx",
-        prompt = "What is the summary?",
-        answer = "This is the summary.",
-        output_passed = "yes",
-        eval_reason = "The summary was concise and accurate.",
-        model_name = "gemini-2.5-pro",
-        temperature = 0.5,
-        top_p = 0.9
-    )
+    test_log_entry = sample_log
 
     # Act
     db_manager.log_interaction(test_log_entry)
 
     # Assert
-    with sqlite3.connect(db_manager.db_path) as conn:
+    with db_manager.connection as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT document_names,
@@ -97,30 +116,166 @@ def test_log_interaction_inserts_correct_data(db_manager):
         assert row[6] == test_log_entry.temperature, "LLM temperatur doesn't Pydantic's model data"
         assert row[7] == test_log_entry.top_p, "LLM top_p names doesn't Pydantic's model data"
         
-def test_schema_migration_handles_rename_and_addition(tmp_path):
+def test_log_interactions_inserts_all_rows_in_one_call(db_manager, sample_log):
+    """
+    Tests that the bulk method stores every given record and a fresh database uses the larger page size.
+    """
+    # Arrange
+    entries = [
+        sample_log.model_copy(update = {"document_names": f"doc_{i}.pdf",
+                                        "prompt": f"Question {i}?",
+                                        "answer": f"Answer {i}."})
+        for i in range(3)
+    ]
+
+    # Act
+    db_manager.log_interactions(entries)
+
+    # Assert
+    with db_manager.connection as conn:
+        prompts = [row[0] for row in conn.execute("SELECT prompt FROM interactions ORDER BY id")]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    assert prompts == ["Question 0?", "Question 1?", "Question 2?"], "Not all bulk rows were inserted in order"
+    assert page_size == 16384, "Fresh database doesn't use the configured page size"
+
+def test_repeated_log_interaction_reuses_one_connection(db_manager, sample_log):
+    """
+    Tests that logging in a loop stores every record through the same connection,
+    so its statement cache keeps the prepared INSERT.
+    """
+    # Arrange
+    entry = sample_log
+    connection = db_manager.connection
+
+    # Act
+    for _ in range(5):
+        db_manager.log_interaction(entry)
+
+    # Assert
+    assert db_manager.connection is connection, "Logging should reuse the connection of the thread"
+    assert connection.execute("SELECT count(*) FROM interactions").fetchone()[0] == 5, "Not all logged rows were stored"
+
+def test_cache_lookups_reuse_the_thread_connection(sample_log, monkeypatch):
+    """
+    Tests that cache lookups and interaction reads run on the connection of the thread,
+    so no lookup pays for a new connection and its PRAGMAs again.
+    """
+    # Arrange
+    # memory tier disabled, every lookup reaches SQLite
+    db_manager = DatabaseManager(db_path = ":memory:", mem_cache_size = 0)
+    db_manager.set_cached_answer(b"key_1", "Answer.", semantic_entry = ("doc_a", "params", [1.0, 0.0]))
+    db_manager.log_interaction(sample_log)
+    monkeypatch.setattr(db_manager, "_connect", lambda: pytest.fail("Lookup opened a new connection"))
+
+    # Act
+    answer = db_manager.get_cached_answer(b"key_1")
+    similar = db_manager.find_semantic_answer("doc_a", "params", [1.0, 0.0], threshold = 0.9)
+    interaction = db_manager.fetch_interaction(1)
+
+    # Assert
+    assert answer == "Answer.", "Exact cache lookup failed on the thread connection"
+    assert similar == "Answer.", "Semantic cache lookup failed on the thread connection"
+    assert interaction.prompt == sample_log.prompt, "Interaction read failed on the thread connection"
+
+def test_fetch_interaction_decompresses_stored_text(tmp_path, sample_log):
+    """
+    Tests that prompt and answer are stored zstd compressed and read back unchanged,
+    also if the plain TEXT columns are not written.
+    """
+    # Arrange
+    db_manager = DatabaseManager(db_path = str(tmp_path / "compressed.db"), store_plain_text = False)
+    long_answer = "The report covers the quarterly revenue and risks. " * 50
+    test_log_entry = sample_log.model_copy(update = {"document_names": "report.pdf",
+                                                     "prompt": "Summarize the risks in the report.",
+                                                     "answer": long_answer})
+
+    # Act
+    db_manager.log_interaction(test_log_entry)
+    fetched = db_manager.fetch_interaction(1)
+
+    # Assert
+    with sqlite3.connect(db_manager.db_path) as conn:
+        row = conn.execute("SELECT prompt, answer, length(answer_zstd) FROM interactions").fetchone()
+    assert row[0] is None and row[1] is None, "Plain TEXT columns should stay empty if disabled"
+    assert row[2] < len(long_answer), "Stored answer is not compressed"
+    assert fetched == test_log_entry, "Fetched interaction differs from the logged one"
+    assert db_manager.fetch_interaction(2) is None, "Not existing interaction should return None"
+
+def test_find_semantic_answer_respects_threshold_and_scope(db_manager):
+    """
+    Tests that the semantic cache returns the answer of the most similar prompt
+    of the same document and LLM params only, if it reaches the threshold.
+    """
+    # Arrange
+    db_manager.add_semantic_entry("doc_a", "params", [1.0, 0.0, 0.0], "Answer about revenue.")
+    db_manager.add_semantic_entry("doc_a", "params", [0.0, 1.0, 0.0], "Answer about risks.")
+    db_manager.add_semantic_entry("doc_b", "params", [0.0, 0.0, 1.0], "Answer of another document.")
+
+    # Act
+    similar = db_manager.find_semantic_answer("doc_a", "params", [0.1, 2.0, 0.0], threshold = 0.9)
+    dissimilar = db_manager.find_semantic_answer("doc_a", "params", [0.0, 0.0, 1.0], threshold = 0.9)
+    other_params = db_manager.find_semantic_answer("doc_a", "other", [1.0, 0.0, 0.0], threshold = 0.9)
+
+    # Assert
+    assert similar == "Answer about risks.", "Most similar prompt answer should be returned"
+    assert dissimilar is None, "Prompt below the threshold must be a cache miss"
+    assert other_params is None, "Entries of other LLM params must not be used"
+    with db_manager.connection as conn:
+        q8_size, fp32_size = conn.execute("SELECT length(embedding_q8), length(embedding) FROM semantic_cache").fetchone()
+    assert q8_size * 4 == fp32_size, "Scan embeddings should be stored as int8"
+
+def test_find_semantic_answer_treats_other_embedding_dimension_as_miss(db_manager):
+    """
+    Tests that stored embeddings of another dimension, e.g. of a former embedding model,
+    are skipped as cache misses instead of failing the vector comparison.
+    """
+    # Arrange
+    db_manager.add_semantic_entry("doc_a", "params", [1.0, 0.0, 0.0], "Answer of the old model.")
+
+    # Act
+    mismatch = db_manager.find_semantic_answer("doc_a", "params", [1.0, 0.0], threshold = 0.9)
+    db_manager.add_semantic_entry("doc_a", "params", [1.0, 0.0], "Answer of the new model.")
+    match = db_manager.find_semantic_answer("doc_a", "params", [1.0, 0.0], threshold = 0.9)
+
+    # Assert
+    assert mismatch is None, "Embeddings of another dimension must be a cache miss"
+    assert match == "Answer of the new model.", "Entries of the query dimension should still be found"
+
+# old and current schemas of the interactions table, each with one data row that has to be preserved
+SCHEMA_VARIANTS = {
+    "with_evaluation": (
+        "CREATE TABLE interactions (id INTEGER PRIMARY KEY, timestamp TEXT, document_names TEXT, "
+        "prompt TEXT, answer TEXT, evaluation TEXT)",
+        "INSERT INTO interactions (evaluation) VALUES ('yes')"
+    ),
+    "without_llm_params": (
+        "CREATE TABLE interactions (id INTEGER PRIMARY KEY, timestamp TEXT, document_names TEXT, "
+        "prompt TEXT, answer TEXT, output_passed TEXT, eval_reason TEXT)",
+        "INSERT INTO interactions (output_passed) VALUES ('yes')"
+    ),
+    "current": (
+        "CREATE TABLE interactions (id INTEGER PRIMARY KEY, timestamp TEXT, document_names TEXT, "
+        "prompt TEXT, answer TEXT, output_passed TEXT, eval_reason TEXT, model_name TEXT, "
+        "temperature REAL, top_p REAL, prompt_zstd BLOB, answer_zstd BLOB)",
+        "INSERT INTO interactions (output_passed) VALUES ('yes')"
+    ),
+}
+
+@pytest.mark.parametrize("schema", SCHEMA_VARIANTS.keys())
+def test_schema_migration_handles_rename_and_addition(tmp_path, schema):
     """
     Tests that the DatabaseManager correctly migrates an old-schema database,
-    renaming 'evaluation' and adding all new columns.
+    renaming 'evaluation' and adding all new columns, and leaves a current one intact.
     """
     # Arrange
     db_path = tmp_path / "migration_test.db"
+    create_sql, insert_sql = SCHEMA_VARIANTS[schema]
 
-    # creates DB with OLD schema
+    # creates DB with OLD schema,
+    # add data row to ensure it's preserved
     with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE interactions (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                document_names TEXT,
-                prompt TEXT,
-                answer TEXT,
-                evaluation TEXT
-            )
-        """)
-        # add data row to ensure it's preserved
-        cursor.execute("INSERT INTO interactions (evaluation) VALUES ('yes')")
-        conn.commit()
+        conn.execute(create_sql)
+        conn.execute(insert_sql)
 
     # Act
     # initialize DatabaseManager on existing, old-schema database,
@@ -143,4 +298,100 @@ def test_schema_migration_handles_rename_and_addition(tmp_path):
 
         cursor.execute("SELECT output_passed FROM interactions")
         data = cursor.fetchone()
-        assert data[0] == 'yes', "Data was not preserved during column rename."        
+        assert data[0] == 'yes', "Data was not preserved during migration."
+
+def test_cached_answer_is_served_from_memory_after_first_lookup(db_manager):
+    """
+    Tests that the in-process LRU answers repeated lookups without SQLite
+    and that new answers are visible immediately.
+    """
+    # Arrange
+    db_manager.set_cached_answer(b"key_1", "First answer.")
+    with db_manager.connection as conn:
+        conn.execute("DELETE FROM interactions_cache")   # only memory tier can answer now
+
+    # Act
+    answer = db_manager.get_cached_answer(b"key_1")
+    db_manager.set_cached_answer(b"key_1", "Updated answer.")
+    updated = db_manager.get_cached_answer(b"key_1")
+
+    # Assert
+    assert answer == "First answer.", "Answer should be served by the in-process LRU"
+    assert updated == "Updated answer.", "LRU entry should be replaced by a new answer"
+
+def test_cache_ttl_expires_both_tiers_and_prunes_rows():
+    """
+    Tests that CACHE_TTL_SECONDS expires exact and semantic entries alike, that expired rows
+    are deleted on the next write and that a memory entry keeps the expiry of its row.
+    """
+    # Arrange
+    db_manager = DatabaseManager(db_path = ":memory:", mem_cache_size = 0, cache_ttl_seconds = 60)
+    db_manager.set_cached_answer(b"old_key", "Old answer.", semantic_entry = ("doc_a", "params", [1.0, 0.0]))
+    db_manager.set_cached_answer(b"aging_key", "Aging answer.")
+    # backdates the rows, timestamps in the ISO format of the stored ones
+    backdated = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime', ?)"
+    with db_manager.connection as conn:
+        conn.execute(f"UPDATE semantic_cache SET created_at = {backdated}", ("-2 hours",))
+        conn.execute(f"UPDATE interactions_cache SET created_at = {backdated} WHERE cache_key = ?", ("-2 hours", b"old_key"))
+        conn.execute(f"UPDATE interactions_cache SET created_at = {backdated} WHERE cache_key = ?", ("-50 seconds", b"aging_key"))
+
+    # Act
+    exact = db_manager.get_cached_answer(b"old_key")
+    similar = db_manager.find_semantic_answer("doc_a", "params", [1.0, 0.0], threshold = 0.9)
+    db_manager.mem_cache_size = 8   # memory tier on for the lookup of the aging row
+    aging = db_manager.get_cached_answer(b"aging_key")
+    db_manager.set_cached_answer(b"new_key", "New answer.")
+
+    # Assert
+    assert exact is None, "Expired exact entry must be a cache miss"
+    assert similar is None, "Expired semantic entry must be a cache miss"
+    assert aging == "Aging answer.", "Unexpired entry should still be served"
+    _, expires_at = db_manager._mem_cache[b"aging_key"]
+    assert expires_at - time.monotonic() <= 11, "Memory entry should expire with its row, not a full TTL later"
+    with db_manager.connection as conn:
+        semantic_rows = conn.execute("SELECT count(*) FROM semantic_cache").fetchone()[0]
+        cached_keys = {row[0] for row in conn.execute("SELECT cache_key FROM interactions_cache")}
+    assert semantic_rows == 0, "Expired semantic rows should be deleted"
+    assert cached_keys == {b"aging_key", b"new_key"}, "Only expired exact rows should be deleted"
+
+def test_cached_answer_and_semantic_entry_share_one_transaction(tmp_path):
+    """
+    Tests that the database runs in WAL mode and that an answer with its semantic
+    entry is written together, so both are found afterwards.
+    """
+    # Arrange
+    # write-ahead logging needs a database file
+    db_manager = DatabaseManager(db_path = str(tmp_path / "wal.db"))
+
+    # Act
+    db_manager.set_cached_answer(b"key_1", "Answer.", semantic_entry = ("doc_a", "params", [1.0, 0.0]))
+
+    # Assert
+    with sqlite3.connect(db_manager.db_path) as conn:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        cached = conn.execute("SELECT llm_answer FROM interactions_cache WHERE cache_key = ?", (b"key_1",)).fetchone()
+    assert journal_mode == "wal", "Database should use write-ahead logging"
+    assert cached == ("Answer.",), "Exact cache entry not written"
+    assert db_manager.find_semantic_answer("doc_a", "params", [1.0, 0.0], threshold = 0.9) == "Answer.", \
+        "Semantic cache entry not written with the answer"
+
+def test_migration_converts_hex_cache_keys_to_blob_digests(tmp_path):
+    """
+    Tests that an existing cache table with hex string keys is rebuilt
+    with raw digest keys, without losing cached answers.
+    """
+    # Arrange
+    db_path = str(tmp_path / "hex_cache.db")
+    digest = bytes(range(32))
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE interactions_cache (cache_key TEXT PRIMARY KEY, llm_answer TEXT NOT NULL, created_at TEXT NOT NULL)")
+        conn.execute("INSERT INTO interactions_cache VALUES (?, ?, ?)", (digest.hex(), "Old answer.", "2025-01-01T00:00:00"))
+
+    # Act
+    db_manager = DatabaseManager(db_path = db_path)
+
+    # Assert
+    with sqlite3.connect(db_path) as conn:
+        key_type = [info[2] for info in conn.execute("PRAGMA table_info(interactions_cache)") if info[1] == "cache_key"][0]
+    assert key_type == "BLOB", "Cache key column should be migrated to BLOB"
+    assert db_manager.get_cached_answer(digest) == "Old answer.", "Migrated answer should be found by its raw digest"
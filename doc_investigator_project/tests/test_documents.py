@@ -7,32 +7,49 @@ Unit tests for the DocumentProcessor and its strategies.
 # ----------
 # Imports
 # ----------
+import ntpath
 import pytest
+import re
 import sys
 import os
 
-from doc_investigator_strategy_pattern.documents import DocumentProcessor, InvalidFileTypeException
+from doc_investigator_strategy_pattern import documents
+from doc_investigator_strategy_pattern.documents import DocumentLoaderStrategy, DocumentProcessor, InvalidFileTypeException
 
 # ----------
 # Coding
 # ----------
 
-# A fixture to provide a configured DocumentProcessor instance
-@pytest.fixture
+# A fixture to provide a configured DocumentProcessor instance,
+# the processor holds no state between calls, so one instance serves all tests
+@pytest.fixture(scope = "session")
 def doc_processor():
     """Provides a DocumentProcessor instance for testing."""
     # These are the extensions our app is configured to support
-    supported_extensions = ['.pdf', '.docx', '.txt', '.xlsx']
+    supported_extensions = frozenset({'.pdf', '.docx', '.txt', '.xlsx'})
     return DocumentProcessor(supported_extensions=supported_extensions)
 
-# A fixture to create mock Gradio file objects
+# expected error of an uploaded PNG file; escaped, the dot of '.png' matches only itself
+UNSUPPORTED_PNG_MESSAGE = re.compile(re.escape("Unsupported file type: '.png'"))
+
+class MockFile:
+    """Gradio file object stand-in, only its 'name' (the file path) is read by the processor."""
+    def __init__(self, name):
+        self.name = name
+
+# A fixture to create mock Gradio file objects without a file on disk
 @pytest.fixture
-def mock_gradio_file(tmp_path):
-    """Creates a factory for mock Gradio file objects."""
-    class MockFile:
-        def __init__(self, name):
-            self.name = name
+def mock_gradio_filename():
+    """Creates a factory for mock Gradio file objects with a synthetic path, for validation only."""
+    def _create_file(filename):
+        return MockFile(name = os.path.join("uploads", filename))
 
+    return _create_file
+
+# A fixture to create mock Gradio file objects with a readable file
+@pytest.fixture
+def mock_gradio_file(tmp_path):
+    """Creates a factory for mock Gradio file objects, writing the file content to disk."""
     def _create_file(filename, content = ""):
         file_path = tmp_path / filename
         file_path.write_text(content)
@@ -40,24 +57,43 @@ def mock_gradio_file(tmp_path):
 
     return _create_file
 
-def test_validate_files_success(doc_processor, mock_gradio_file):
+def test_validate_files_success(doc_processor, mock_gradio_filename):
     """Tests that validate_files passes with a list of supported file types."""
     valid_files = [
-        mock_gradio_file("report.docx"),
-        mock_gradio_file("data.txt")
+        mock_gradio_filename("report.docx"),
+        mock_gradio_filename("data.txt")
     ]
     # should run without raising an exception
     doc_processor.validate_files(valid_files)
 
-def test_validate_files_failure(doc_processor, mock_gradio_file):
+def test_validate_files_failure(doc_processor, mock_gradio_filename):
     """Tests that validate_files raises InvalidFileTypeException for unsupported types."""
     invalid_files = [
-        mock_gradio_file("report.docx"),
-        mock_gradio_file("image.png") # not supported doc type
+        mock_gradio_filename("report.docx"),
+        mock_gradio_filename("image.png") # not supported doc type
     ]
-    with pytest.raises(InvalidFileTypeException, match = "Unsupported file type: '.png'"):
+    with pytest.raises(InvalidFileTypeException, match = UNSUPPORTED_PNG_MESSAGE):
         doc_processor.validate_files(invalid_files)
 
+@pytest.mark.parametrize("file_path", [
+    r"C:\docs\report.PDF",
+    "C:/docs/report.pdf",
+    "dir/file.name/report",    # dot in a directory name only
+    r"dir\file.name/report",
+    r"dir/file.name\.bashrc",
+])
+def test_file_extension_matches_splitext_with_windows_separators(file_path, monkeypatch):
+    """Tests that extensions are taken from the file name after both Windows path separators."""
+    # Arrange
+    monkeypatch.setattr(documents.os, "sep", ntpath.sep)
+    monkeypatch.setattr(documents.os, "altsep", ntpath.altsep)
+
+    # Act
+    extension = documents._file_extension(file_path)
+
+    # Assert
+    assert extension == ntpath.splitext(file_path)[1].lower(), "Extension differs from 'splitext' on Windows"
+
 def test_process_single_txt_file(doc_processor, mock_gradio_file):
     """Tests text extraction from a single .txt file."""
     # Arrange
@@ -71,14 +107,26 @@ def test_process_single_txt_file(doc_processor, mock_gradio_file):
     assert file_content in result, "Primary file content not as expected in text result"
     assert "--- CONTENT FROM test.txt ---" in result, "Final file content text line not in text result"
     
-def test_process_multiple_files(doc_processor, mock_gradio_file):
-    """Tests text extraction from multiple files, ensuring content is combined."""
+def test_process_multiple_files(doc_processor, mock_gradio_filename, monkeypatch):
+    """
+    Tests text extraction from multiple files, ensuring content is combined.
+    The combination is done by the processor, so a stub loader replaces the file access;
+    the loader itself is tested with a file on disk by test_process_single_txt_file.
+    """
     # Arrange
     content1 = "Content from file one."
     content2 = "Content from file two."
+    contents = {"one.txt": content1, "two.txt": content2}
+
+    class StubLoaderStrategy(DocumentLoaderStrategy):
+        def load(self, file_path: str) -> str:
+            return contents[os.path.basename(file_path)]
+
+    # restored after the test, the processor is shared by all tests
+    monkeypatch.setitem(doc_processor._strategies, '.txt', StubLoaderStrategy())
     files = [
-        mock_gradio_file("one.txt", content=content1),
-        mock_gradio_file("two.txt", content=content2)
+        mock_gradio_filename("one.txt"),
+        mock_gradio_filename("two.txt")
     ]
 
     # Act
@@ -91,6 +139,35 @@ def test_process_multiple_files(doc_processor, mock_gradio_file):
     assert "--- CONTENT FROM two.txt ---" in result, "Final file content 2 text line not in combined text result"
     assert result.count("\n\n") >= 1, "Page breaks not as expected in combined text result"      
 
+def test_extract_rejects_unsupported_file_in_same_pass(doc_processor, mock_gradio_file):
+    """Tests that the single pass extraction validates each file before loading it."""
+    files = [
+        mock_gradio_file("one.txt", content = "Content from file one."),
+        mock_gradio_file("image.png")  # not supported doc type
+    ]
+    with pytest.raises(InvalidFileTypeException, match = UNSUPPORTED_PNG_MESSAGE):
+        doc_processor.extract(files)
+
+@pytest.mark.asyncio
+async def test_aprocess_files_keeps_upload_order(doc_processor, mock_gradio_file, monkeypatch):
+    """
+    Tests that concurrent extraction returns the same text as the sequential one,
+    without validating the files again, they are validated once by the 'process_inputs' action.
+    """
+    # Arrange
+    files = [
+        mock_gradio_file("one.txt", content = "Content from file one."),
+        mock_gradio_file("two.txt", content = "Content from file two.")
+    ]
+    monkeypatch.setattr(doc_processor, "validate_files", lambda files: pytest.fail("Files validated again"))
+
+    # Act
+    result = await doc_processor.aprocess_files(files)
+
+    # Assert
+    assert result == doc_processor.extract(files), "Concurrent extraction differs from sequential one"
+    assert result.index("one.txt") < result.index("two.txt"), "Files are not in upload order"
+
 def test_loader_strategy_for_nonexistent_file(doc_processor, tmp_path):
     """Tests that loaders handle non-existent files gracefully."""
     # Note: testing this through main processor
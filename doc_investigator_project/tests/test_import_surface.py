@@ -0,0 +1,80 @@
+# tests/test_import_surface.py
+
+"""
+Unit tests for the import behaviour and the lazy component creation of the 'main' entry point module.
+Heavy packages are imported lazily, the eager mode lets CI find broken deferred imports.
+"""
+
+# ----------
+# Imports
+# ----------
+import importlib
+import sys
+import threading
+import time
+import pytest
+
+# ----------
+# Coding
+# ----------
+
+@pytest.fixture
+def fresh_main(monkeypatch):
+    """Provides a function that imports 'main' anew, the import is undone after the test."""
+    monkeypatch.delitem(sys.modules, "main", raising = False)
+    yield lambda: importlib.import_module("main")
+    sys.modules.pop("main", None)
+
+def test_import_does_not_initialize_app(fresh_main, monkeypatch):
+    """
+    Tests that importing 'main' neither asks for the API key nor builds the server app.
+    """
+    # Arrange
+    monkeypatch.delenv("DOC_INV_EAGER_IMPORT", raising = False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising = False)
+
+    # Act
+    main = fresh_main()
+
+    # Assert
+    assert "server_app" not in vars(main), "Server app should be created on first access only"
+    assert main.get_api_key.cache_info().currsize == 0, "API key should not be read on import"
+
+def test_eager_import_resolves_all_lazy_modules(fresh_main, monkeypatch):
+    """
+    Tests that the eager import mode imports every module deferred by 'main'.
+    """
+    # Arrange
+    monkeypatch.setenv("DOC_INV_EAGER_IMPORT", "1")
+
+    # Act
+    main = fresh_main()
+
+    # Assert
+    missing = [name for name in main.LAZY_MODULES if name not in sys.modules]
+    assert not missing, f"Lazy modules not imported in eager mode: {missing}"
+
+def test_concurrent_first_requests_create_services_once(fresh_main, monkeypatch):
+    """
+    Tests that concurrent first requests share one creation of the app components.
+    """
+    # Arrange
+    main = fresh_main()
+    calls = []
+    def slow_create_services():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)   # keeps the first creation running while the other requests arrive
+        return object(), object(), object()
+    monkeypatch.setattr(main, "_create_services", slow_create_services)
+    results = []
+    threads = [threading.Thread(target = lambda: results.append(main.get_services())) for _ in range(8)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert len(calls) == 1, "App components should be created only once"
+    assert all(result is results[0] for result in results), "All requests should get the same components"
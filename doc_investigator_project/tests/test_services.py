@@ -0,0 +1,133 @@
+# tests/test_services.py
+
+"""
+Unit tests for the GeminiService, running without calls to the Google Gemini API.
+"""
+
+# ----------
+# Imports
+# ----------
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from opentelemetry import trace
+
+from doc_investigator_strategy_pattern import services
+from doc_investigator_strategy_pattern.config import Config
+from doc_investigator_strategy_pattern.services import GeminiService
+
+# ----------
+# Coding
+# ----------
+
+@pytest.fixture
+def ai_service():
+    """Provides a GeminiService with a dummy key, model creation needs no network access."""
+    return GeminiService(api_key = "dummy-key", config = Config(CONTEXT_CACHE_MIN_CHARACTERS = 10))
+
+@patch.object(services.genai.caching.CachedContent, 'create')
+def test_context_cache_uploads_document_once(mock_create, ai_service):
+    """
+    Tests that the document context is uploaded once and reused for further questions,
+    while small contexts are sent inline without a cache.
+    """
+    # Arrange
+    mock_create.return_value = MagicMock()
+    document = "Quarterly revenue grew by ten percent."
+
+    # Act
+    first = ai_service.ensure_context_cache(document)
+    second = ai_service.ensure_context_cache(document)
+    small = ai_service.ensure_context_cache("tiny")
+
+    # Assert
+    mock_create.assert_called_once()
+    assert first is second, "Cached content of the same document should be reused"
+    assert small is None, "Context below the minimal cache size should be sent inline"
+
+@patch.object(services.genai.caching.CachedContent, 'create')
+def test_context_cache_upload_does_not_block_other_documents(mock_create, ai_service):
+    """
+    Tests that a running upload doesn't block the lookup of another cached document,
+    and that concurrent requests of the uploading document share its upload.
+    """
+    # Arrange
+    upload_started, release_upload = threading.Event(), threading.Event()
+    def create(contents, **kwargs):
+        if "slow" in contents[0]:
+            upload_started.set()
+            release_upload.wait(timeout = 5)
+        return MagicMock()
+    mock_create.side_effect = create
+    cached_document = "Quarterly revenue grew by ten percent."
+    slow_document = "A slow upload of a large document."
+    cached = ai_service.ensure_context_cache(cached_document)
+    results, lookups = [], []
+    uploads = [threading.Thread(target = lambda: results.append(ai_service.ensure_context_cache(slow_document)))
+               for _ in range(2)]
+    lookup = threading.Thread(target = lambda: lookups.append(ai_service.ensure_context_cache(cached_document)))
+
+    # Act
+    for upload in uploads:
+        upload.start()
+    upload_started.wait(timeout = 5)
+    lookup.start()
+    lookup.join(timeout = 1)   # while the upload is still running
+    lookup_finished = not lookup.is_alive()
+    release_upload.set()
+    for upload in uploads:
+        upload.join()
+
+    # Assert
+    assert lookup_finished, "Lookup of a cached document should not wait for another upload"
+    assert lookups == [cached], "Lookup should return the cached content of its document"
+    assert mock_create.call_count == 2, "Concurrent requests of one document should upload it once"
+    assert results[0] is results[1], "Concurrent requests of one document should share its cached content"
+
+def test_prompt_prefix_is_byte_stable_across_questions(ai_service):
+    """
+    Tests that system rules and document context form an identical prompt prefix
+    for different questions, so provider-side prefix caching can hit.
+    """
+    # Arrange
+    document = "Quarterly revenue grew by ten percent."
+    stable_part = ai_service._system_prefix + ai_service._context_block(document)
+
+    # Act
+    first = ai_service._build_prompt(document, "What grew?").encode('utf-8')
+    second = ai_service._build_prompt(document, "By how much?").encode('utf-8')
+
+    # Assert
+    prefix_length = len(stable_part.encode('utf-8'))
+    assert first[:prefix_length] == second[:prefix_length], "Prompt prefix differs between questions"
+    assert first.startswith(b"You are a meticulous"), "Prompt should start without leading whitespace"
+    assert b"\n    " not in first, "Prompt should not contain indentation of the source code"
+
+def test_disabled_tracing_uses_noop_tracer():
+    """Tests that no spans are recorded if tracing is disabled in the config."""
+    # Act
+    service = GeminiService(api_key = "dummy-key", config = Config(TRACE_ENABLED = False))
+
+    # Assert
+    assert isinstance(service.tracer, trace.NoOpTracer), "Disabled tracing should use the no-op tracer"
+
+def test_answers_batch_uses_one_api_call(ai_service):
+    """
+    Tests that several cases are answered by one call and the JSON answers
+    are returned in order of the cases.
+    """
+    # Arrange
+    ai_service.model = MagicMock()
+    response = ai_service.model.generate_content.return_value
+    response.prompt_feedback.block_reason = None
+    response.text = '{"answers": ["First answer.", "Second answer."]}'
+    cases = [("Context one.", "Question one?"), ("Context two.", "Question two?")]
+
+    # Act
+    answers = ai_service.get_answers_batch(cases, temperature = 0.2, top_p = 0.95)
+
+    # Assert
+    ai_service.model.generate_content.assert_called_once()
+    prompt = ai_service.model.generate_content.call_args.args[0]
+    assert "CASE 2:\nCONTEXT:\n---\nContext two." in prompt, "Every case should be part of the single prompt"
+    assert answers == ["First answer.", "Second answer."], "Answers not returned in order of the cases"
@@ -3,12 +3,16 @@
 # ----------
 # Imports
 # ----------
+import dataclasses
 import pytest
-from unittest.mock import MagicMock, ANY
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+from unittest.mock import AsyncMock, MagicMock, ANY
+
+from burr.core import State
 
 # Import the components to be tested and mocked
-from doc_investigator_strategy_pattern.config import Config
-from doc_investigator_strategy_pattern.state_machine import build_application, InvestigationState
+from doc_investigator_strategy_pattern.state_machine import bind_actions, build_application, check_cache, InvestigationState
 from doc_investigator_strategy_pattern.documents import InvalidFileTypeException
 
 # ----------
@@ -18,26 +22,37 @@ from doc_investigator_strategy_pattern.documents import InvalidFileTypeException
 # --- Fixtures for Mocking Dependencies ---
 
 @pytest.fixture
-def mock_config():
-    """Provides a mock Config object with known values for testing."""
-    return Config(UNKNOWN_ANSWER = "Unknown",
-                  NOT_ALLOWED_ANSWER = "Not Allowed",
-                  )
+def deps(base_config):
+    """
+    Provides the dependencies of `build_application` in one namespace, named like its parameters:
+    - config: Config object with known values for testing; tracing is off,
+              so no test writes Burr tracking data into the working directory
+    - db_manager: mock DatabaseManager
+    - doc_processor: mock DocumentProcessor, its file processing is awaited by the state machine
+    - ai_service: mock GeminiService, its answer is streamed to the state machine;
+                  set 'answer' attribute to define the final streamed answer
+    """
+    doc_processor = MagicMock()
+    doc_processor.aprocess_files = AsyncMock()
 
-@pytest.fixture
-def mock_db_manager():
-    """Provides a mock DatabaseManager."""
-    return MagicMock()
+    ai_service = MagicMock()
 
-@pytest.fixture
-def mock_doc_processor():
-    """Provides a mock DocumentProcessor."""
-    return MagicMock()
+    async def astream_answer(**kwargs):
+        # two chunks like a real stream, accumulated as the service yields them
+        yield ai_service.answer[:1]
+        yield ai_service.answer
 
-@pytest.fixture
-def mock_ai_service():
-    """Provides a mock GeminiService."""
-    return MagicMock()
+    ai_service.astream_answer = MagicMock(side_effect = astream_answer)
+
+    return SimpleNamespace(
+        config = dataclasses.replace(base_config,
+                                     UNKNOWN_ANSWER = "Unknown",
+                                     NOT_ALLOWED_ANSWER = "Not Allowed",
+                                     TRACE_ENABLED = False),
+        db_manager = MagicMock(),
+        doc_processor = doc_processor,
+        ai_service = ai_service,
+    )
 
 @pytest.fixture
 def mock_gradio_file():
@@ -49,23 +64,19 @@ def mock_gradio_file():
 
 # --- Test Cases for State Machine Workflows ---
 
-def test_happy_path_with_human_evaluation(
-    mock_config, mock_db_manager, mock_doc_processor, mock_ai_service, mock_gradio_file
+@pytest.mark.asyncio
+async def test_happy_path_with_human_evaluation(
+    deps, mock_gradio_file
 ):
     """
     Tests the full workflow: valid file -> AI generates a real answer -> human evaluates positively.
     """
     # Arrange: configure mocks for "happy path"
-    mock_doc_processor.process_files.return_value = "Extracted text."
-    mock_db_manager.get_cached_answer.return_value = None   # mocks a cache miss
-    mock_ai_service.get_answer.return_value = "This is a real answer."
+    deps.doc_processor.aprocess_files.return_value = "Extracted text."
+    deps.db_manager.get_cached_answer.return_value = None   # mocks a cache miss
+    deps.ai_service.answer = "This is a real answer."
     
-    app = build_application(
-        config = mock_config,
-        db_manager = mock_db_manager,
-        doc_processor = mock_doc_processor,
-        ai_service = mock_ai_service
-    )
+    app = build_application(**vars(deps))
     initial_inputs = {
         "files": [mock_gradio_file("test.pdf")],
         "prompt": "Summarize.",
@@ -73,7 +84,7 @@ def test_happy_path_with_human_evaluation(
     }
     
     # Act: run until machine needs human input
-    final_action, state, _ = app.run(halt_after = ["await_human_evaluation"], inputs = initial_inputs)
+    final_action, state, _ = await app.arun(halt_after = ["await_human_evaluation"], inputs = initial_inputs)
 
     # Assert: check state and stopped at right place
     assert final_action.name == "await_human_evaluation"
@@ -98,141 +109,234 @@ def test_happy_path_with_human_evaluation(
     assert final_action.name == "process_human_evaluation"
     final_action, _, _ = app.step()                        # 'end' action takes no inputs
     assert final_action.name == "end"
-    mock_db_manager.log_interaction.assert_called_once()   # db is called
-    logged_data = mock_db_manager.log_interaction.call_args[0][0]
+    deps.db_manager.log_interaction.assert_called_once()   # db is called
+    logged_data = deps.db_manager.log_interaction.call_args[0][0]
     assert logged_data.output_passed == "yes"
     assert logged_data.eval_reason == "It was good."
 
-def test_predefined_answer_path_auto_logs(
-    mock_config, mock_db_manager, mock_doc_processor, mock_ai_service, mock_gradio_file
+
+# --- Table of single run workflows, each one from the inputs until the flow halts ---
+
+CACHED_ANSWER = "This is a previously cached answer."
+FRESH_ANSWER = "A fresh answer from the LLM."
+INVALID_FILE_ERROR = InvalidFileTypeException("Unsupported file type")
+
+def check_auto_logged(app, deps):
+    """AI returned the predefined 'Unknown' answer, it is logged without waiting for a human."""
+    assert app.state["llm_answer"] == "Unknown", "Predefined answer not in state"
+    deps.db_manager.log_interaction.assert_called_once()
+    logged_data = deps.db_manager.log_interaction.call_args[0][0]
+    assert logged_data.answer == "Unknown", "Predefined answer not logged"
+    assert logged_data.output_passed == "no", "Predefined answer should be logged as not passed"
+
+def check_invalid_file_error(app, deps):
+    """Error message is written to state by 'process_inputs' action, no further actions run."""
+    assert app.state["error_message"] == str(INVALID_FILE_ERROR), "Validation error message not in state"
+    deps.doc_processor.aprocess_files.assert_not_called()
+    deps.ai_service.astream_answer.assert_not_called()
+
+def check_cache_miss(app, deps):
+    """LLM is called to create an answer and the cache is updated with it."""
+    deps.db_manager.get_cached_answer.assert_called_once()
+    deps.ai_service.astream_answer.assert_called_once()
+    assert deps.ai_service.astream_answer.call_args.kwargs["doc_fingerprint"] == app.state["doc_fingerprint"], \
+        "Context cache should be looked up by the fingerprint of the state"
+    deps.db_manager.set_cached_answer.assert_called_once_with(ANY, FRESH_ANSWER)
+    assert app.state["llm_answer"] == FRESH_ANSWER, "LLM hasn't created a new answer"
+    assert len(app.state["doc_fingerprint"]) == 64, "Document fingerprint should be computed during processing"
+
+def check_cache_hit(app, deps):
+    """LLM is SKIPPED; state machine calls `set_cached_answer` on a cache hit to update the timestamp."""
+    deps.db_manager.get_cached_answer.assert_called_once()
+    deps.ai_service.astream_answer.assert_not_called()
+    deps.db_manager.set_cached_answer.assert_called_once_with(ANY, CACHED_ANSWER)
+    assert app.state["llm_answer"] == CACHED_ANSWER, "Cache hit, but answer is not the cached one"
+
+@dataclasses.dataclass(frozen = True)
+class Scenario:
+    """Mocked service results of one workflow, the action it halts at and its specific checks."""
+    name: str
+    halt_after: List[str]
+    expected_action: str
+    check: Callable[..., None]
+    file_name: str = "doc.pdf"
+    validation_error: Optional[Exception] = None
+    cached_answer: Optional[str] = None
+    ai_answer: Optional[str] = None
+
+SCENARIOS = [
+    Scenario("predefined_answer_auto_logs", ["end"], "end", check_auto_logged,
+             ai_answer = "Unknown"),
+    Scenario("invalid_file_error", ["error"], "error", check_invalid_file_error,
+             file_name = "image.png", validation_error = INVALID_FILE_ERROR),
+    Scenario("cache_miss_calls_llm", ["await_human_evaluation"], "await_human_evaluation", check_cache_miss,
+             ai_answer = FRESH_ANSWER),
+    Scenario("cache_hit_skips_llm", ["await_human_evaluation"], "await_human_evaluation", check_cache_hit,
+             cached_answer = CACHED_ANSWER),
+]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scenario", SCENARIOS, ids = lambda scenario: scenario.name)
+async def test_workflow_scenarios(
+    scenario, deps, mock_gradio_file
 ):
     """
-    Tests that if AI returns a predefined response, it auto-logs and terminates.
+    Tests workflows running in one go: predefined AI answers are auto-logged,
+    invalid files lead to the error state, cache misses call the LLM and cache hits skip it.
     """
-    # Arrange: AI returns predefined "Unknown" answer
-    mock_doc_processor.process_files.return_value = "Extracted text."
-    mock_db_manager.get_cached_answer.return_value = None  # mocks a cache miss
-    mock_ai_service.get_answer.return_value = mock_config.UNKNOWN_ANSWER
-    
-    app = build_application(
-        config = mock_config,
-        db_manager = mock_db_manager,
-        doc_processor = mock_doc_processor,
-        ai_service = mock_ai_service
-    )
+    # Arrange
+    deps.doc_processor.validate_files.side_effect = scenario.validation_error
+    deps.doc_processor.aprocess_files.return_value = "Extracted text."
+    deps.db_manager.get_cached_answer.return_value = scenario.cached_answer   # None mocks a cache miss
+    deps.ai_service.answer = scenario.ai_answer
+
+    app = build_application(**vars(deps))
     inputs = {
-        "files": [mock_gradio_file("test.pdf")],
-        "prompt": "A question",
-        "llm_params": {"temperature": 0.2, "top_p": 0.95},
+        "files": [mock_gradio_file(scenario.file_name)],
+        "prompt": "summarize",
+        "llm_params": {"temperature": 0.5, "top_p": 0.95}
     }
 
-    # Act: run completion
-    final_action, state, _ = app.run(halt_after = ["end"], inputs = inputs)
+    # Act
+    final_action, _, _ = await app.arun(halt_after = scenario.halt_after, inputs = inputs)
 
-    # Assert: flow end without waiting for human
-    assert final_action.name == "end"
-    assert app.state["llm_answer"] == mock_config.UNKNOWN_ANSWER
-    mock_db_manager.log_interaction.assert_called_once()
-    logged_data = mock_db_manager.log_interaction.call_args[0][0]
-    assert logged_data.answer == mock_config.UNKNOWN_ANSWER
-    assert logged_data.output_passed == "no"
+    # Assert
+    assert final_action.name == scenario.expected_action, f"Flow halted at '{final_action.name}'"
+    scenario.check(app, deps)
 
 
-def test_process_inputs_with_invalid_file_error_path(
-    mock_config, mock_db_manager, mock_doc_processor, mock_ai_service, mock_gradio_file
+def test_process_inputs_with_blank_prompt_error_path(
+    deps, mock_gradio_file
 ):
     """
-    Tests if inputs file validation fails, flow transitions directly to error state.
+    Tests that a blank prompt routes directly to the error state, without extracting documents.
     """
-    # Arrange: doc processor config to raise validation error
-    error_message = "Unsupported file type"
-    mock_doc_processor.validate_files.side_effect = InvalidFileTypeException(error_message)
-    
-    app = build_application(
-        config = mock_config,
-        db_manager = mock_db_manager,
-        doc_processor = mock_doc_processor,
-        ai_service = mock_ai_service
-    )
+    # Arrange
+    app = build_application(**vars(deps))
     inputs = {
-        "files": [mock_gradio_file("image.png")],
-        "prompt": "Any prompt",
+        "files": [mock_gradio_file("test.pdf")],
+        "prompt": "   ",
         "llm_params": {"temperature": 0.2, "top_p": 0.95},
     }
 
-    # Act: run state machine
+    # Act
     final_action, state, _ = app.run(halt_after = ["error"], inputs = inputs)
 
-    # Assert: check being in error state, no further actions
+    # Assert
     assert final_action.name == "error"
-    # error message written to state by 'process_inputs' action before machine halt
-    assert app.state["error_message"] == str(InvalidFileTypeException(error_message))
-    mock_doc_processor.process_files.assert_not_called()
-    mock_ai_service.get_answer.assert_not_called()
+    assert app.state["error_message"] == "Please enter a prompt to continue.", "Blank prompt error message not as expected"
+    deps.doc_processor.aprocess_files.assert_not_called()
+    deps.db_manager.get_cached_answer.assert_not_called()
 
 
-def test_workflow_on_cache_miss_calls_llm_and_updates_cache(
-    mock_config, mock_db_manager, mock_doc_processor, mock_ai_service, mock_gradio_file
+@pytest.mark.asyncio
+async def test_workflow_on_semantic_cache_hit_skips_llm(
+    deps, mock_gradio_file
 ):
     """
-    Tests full workflow on a cache miss, ensuring LLM is called to create an answer
-    and the cache is updated with it.
+    Tests that with enabled semantic cache an exact miss falls back to the answer
+    of a similar prompt and the LLM is skipped.
     """
     # Arrange
-    mock_doc_processor.process_files.return_value = "Extracted text."
-    mock_db_manager.get_cached_answer.return_value = None    # mocks a cache miss
-    mock_ai_service.get_answer.return_value = "A fresh answer from the LLM."
-    
-    app = build_application(
-        config = mock_config,
-        db_manager = mock_db_manager,
-        doc_processor = mock_doc_processor,
-        ai_service = mock_ai_service
-    )
+    deps.config = dataclasses.replace(deps.config, SEMANTIC_CACHE_ENABLED = True)
+    deps.doc_processor.aprocess_files.return_value = "Extracted text."
+    deps.db_manager.get_cached_answer.return_value = None   # mocks an exact cache miss
+    deps.ai_service.embed_text.return_value = [0.1, 0.2, 0.3]
+    deps.db_manager.find_semantic_answer.return_value = "Answer of a similar prompt."
+
+    app = build_application(**vars(deps))
     inputs = {
-        "files": [mock_gradio_file("doc.pdf")],
-        "prompt": "summarize",
+        "files": [mock_gradio_file("doc.pdf")], "prompt": "summarise it",
         "llm_params": {"temperature": 0.5, "top_p": 0.95}
     }
 
     # Act
-    app.run(halt_after = ["await_human_evaluation"], inputs = inputs)
+    await app.arun(halt_after = ["await_human_evaluation"], inputs = inputs)
 
     # Assert
-    mock_db_manager.get_cached_answer.assert_called_once()
-    mock_ai_service.get_answer.assert_called_once()
-    mock_db_manager.set_cached_answer.assert_called_once_with(ANY, "A fresh answer from the LLM.")
-    assert app.state["llm_answer"] == "A fresh answer from the LLM.", "LLM hasn't created a new answer"
+    deps.ai_service.embed_text.assert_called_once_with("summarise it")
+    deps.db_manager.find_semantic_answer.assert_called_once_with(ANY, ANY, [0.1, 0.2, 0.3], 0.92)
+    params_key = deps.db_manager.find_semantic_answer.call_args.args[1]
+    assert params_key.endswith(deps.config.EMBEDDING_MODEL_NAME), "Semantic entries should be scoped by the embedding model"
+    deps.ai_service.astream_answer.assert_not_called()
+    # the reused answer is cached under the exact key, without storing the prompt as new semantic entry
+    deps.db_manager.set_cached_answer.assert_called_once_with(ANY, "Answer of a similar prompt.")
+    assert app.state["llm_answer"] == "Answer of a similar prompt.", "Semantic hit, but answer is not the cached one"
 
 
-def test_workflow_on_cache_hit_skips_llm(
-    mock_config, mock_db_manager, mock_doc_processor, mock_ai_service, mock_gradio_file
+@pytest.mark.asyncio
+async def test_cache_key_ignores_float_noise_in_llm_params(
+    deps, mock_gradio_file
 ):
     """
-    Tests full workflow on a cache hit, ensuring the LLM is SKIPPED and no update happened.
+    Tests that LLM params differing only beyond the canonical precision share a cache key.
     """
     # Arrange
-    mock_doc_processor.process_files.return_value = "Extracted text."
-    cached_answer = "This is a previously cached answer."
-    mock_db_manager.get_cached_answer.return_value = cached_answer   # mocks a cache hit
-    
-    app = build_application(
-        config = mock_config,
-        db_manager = mock_db_manager,
-        doc_processor = mock_doc_processor,
-        ai_service = mock_ai_service
-    )
-    inputs = {
-        "files": [mock_gradio_file("doc.pdf")], "prompt": "summarize",
-        "llm_params": {"temperature": 0.5}
-    }
+    deps.doc_processor.aprocess_files.return_value = "Extracted text."
+    deps.db_manager.get_cached_answer.return_value = "Cached answer."
+
+    # actions are bound once, each run gets a fresh application
+    actions = bind_actions(**vars(deps))
+
+    # Act
+    for temperature in (0.7, 0.70000001):
+        app = build_application(**vars(deps), actions = actions)
+        inputs = {
+            "files": [mock_gradio_file("doc.pdf")], "prompt": "summarize",
+            "llm_params": {"temperature": temperature, "top_p": 0.95}
+        }
+        await app.arun(halt_after = ["await_human_evaluation"], inputs = inputs)
+
+    # Assert
+    first_key, second_key = (call.args[0] for call in deps.db_manager.get_cached_answer.call_args_list)
+    assert first_key == second_key, "Equal LLM params at canonical precision should share a cache key"
+
+
+@pytest.mark.asyncio
+async def test_cache_key_ignores_unicode_form_and_whitespace_of_prompt(
+    deps, mock_gradio_file
+):
+    """
+    Tests that prompts differing only in Unicode normal form or whitespace share a cache key.
+    """
+    # Arrange
+    deps.doc_processor.aprocess_files.return_value = "Extracted text."
+    deps.db_manager.get_cached_answer.return_value = "Cached answer."
+
+    # actions are bound once, each run gets a fresh application
+    actions = bind_actions(**vars(deps))
+
+    # Act
+    for prompt in ("Caf\u00e9  menu?\n", "Cafe\u0301 menu?"):   # NFC vs NFD, extra whitespace
+        app = build_application(**vars(deps), actions = actions)
+        inputs = {
+            "files": [mock_gradio_file("doc.pdf")], "prompt": prompt,
+            "llm_params": {"temperature": 0.7, "top_p": 0.95}
+        }
+        await app.arun(halt_after = ["await_human_evaluation"], inputs = inputs)
+
+    # Assert
+    first_key, second_key = (call.args[0] for call in deps.db_manager.get_cached_answer.call_args_list)
+    assert first_key == second_key, "Normalized equal prompts should share a cache key"
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_drops_embedding_of_an_earlier_run(deps):
+    """
+    Tests that an exact cache hit resets the prompt embedding, so an embedding of an earlier
+    run of the same application can't be stored as semantic entry of another prompt.
+    """
+    # Arrange
+    deps.config = dataclasses.replace(deps.config, SEMANTIC_CACHE_ENABLED = True)
+    deps.db_manager.get_cached_answer.return_value = "Cached answer."
+    state = State({
+        "prompt": "summarize", "llm_params": {"temperature": 0.7, "top_p": 0.95},
+        "doc_fingerprint": "fingerprint", "prompt_embedding": [0.1, 0.2, 0.3]   # left by an earlier run
+    })
 
     # Act
-    app.run(halt_after = ["await_human_evaluation"], inputs = inputs)
+    _, new_state = await check_cache(state, db_manager = deps.db_manager, ai_service = deps.ai_service, config = deps.config)
 
     # Assert
-    mock_db_manager.get_cached_answer.assert_called_once()
-    mock_ai_service.get_answer.assert_not_called()
-    # state machine calls `set_cached_answer` on a cache hit to update the timestamp.
-    mock_db_manager.set_cached_answer.assert_called_once_with(ANY, cached_answer)
-    assert app.state["llm_answer"] == cached_answer, "Cache hit, but answer is not the cached one"
+    assert new_state["hit"] is True, "Cached answer should be a cache hit"
+    assert new_state["prompt_embedding"] is None, "Embedding of an earlier run must be reset"